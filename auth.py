@@ -3,7 +3,6 @@ import time
 import hashlib
 import os
 import json
-from supabase_client import supabase_sign_in
 
 
 def check_authentication():
@@ -21,6 +20,8 @@ def check_authentication():
         if current_time - last_activity > 1800:  # 30 minutes
             # Session expired
             st.session_state.authenticated = False
+            from supabase_client import release_authed_supabase
+            release_authed_supabase()
             st.session_state.pop("supabase_session", None)
             st.session_state.pop("current_user", None)
             st.warning("⏱️ Session expired after 30 minutes of inactivity. Please log in again.")
@@ -110,6 +111,9 @@ def check_authentication():
                 if not email or not password:
                     st.error("Please enter both email and password")
                 else:
+                    # Imported here: the Supabase SDK is slow to import and the
+                    # login page shouldn't wait for it
+                    from supabase_client import supabase_sign_in
                     try:
                         supabase_session = supabase_sign_in(email, password)
                     except Exception as e:
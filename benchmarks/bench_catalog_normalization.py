@@ -0,0 +1,104 @@
+"""
+Benchmark: Catalog Normalization
+--------------------------------
+Compares the original per-row load_master cleanup (two ``.apply(re.sub)``
+passes, a Python ``clean_price`` and multi-pass filtering) against the
+vectorized ``catalog.normalize_catalog`` pipeline on synthetic products.
+
+Usage:
+    python benchmarks/bench_catalog_normalization.py [--rows 100000] [--repeat 3]
+"""
+
+import argparse
+import os
+import random
+import re
+import sys
+import time
+
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from catalog import normalize_catalog  # noqa: E402
+
+
+def make_products(n, seed=7):
+    """Synthetic rows shaped like the renamed Supabase products table."""
+    rng = random.Random(seed)
+    words = ["Lavender", "Mint", "Candle", "Soap", "Bath", "Salt", "Rose", "Balm", "Tea", "Gift"]
+    names, prices, skus = [], [], []
+    for i in range(n):
+        a, b = rng.choice(words), rng.choice(words)
+        names.append(rng.choice([f"{a}x{b}", f"{a} x {b}", f" {a}  x{b} ", f"{a} {b}", ""]))
+        prices.append(rng.choice([f"${rng.uniform(1, 99):.2f}", f"{rng.uniform(1, 99):.2f}", "", None, "1,299.00", "n/a"]))
+        skus.append("" if i % 97 == 0 else f"TH-{i:07d}")
+    return pd.DataFrame({
+        "Category": [rng.choice(["Candles", "Bath", None]) for _ in range(n)],
+        "Product name": names,
+        "Product Status": "Active",
+        "SKU#": skus,
+        "Final Price": prices,
+    })
+
+
+def legacy_normalize(df):
+    """The pre-vectorization load_master body, kept verbatim for comparison."""
+    df["Product name"] = df["Product name"].astype(str).str.strip()
+    df["Category"] = df["Category"].astype(str).str.strip()
+    df["SKU#"] = df["SKU#"].astype(str).str.strip()
+
+    df["Product name"] = df["Product name"].apply(
+        lambda x: re.sub(r'(\w)\s*x\s*([A-Z])', r'\1 x \2', str(x)) if pd.notna(x) else x
+    )
+    df["Product name"] = df["Product name"].apply(
+        lambda x: re.sub(r'(\w)x([A-Z])', r'\1 x \2', str(x)) if pd.notna(x) else x
+    )
+
+    def clean_price(x):
+        if pd.isna(x) or x == "" or str(x).lower in ["nan", "none", ""]:
+            return 0.0
+        if isinstance(x, str):
+            x = x.replace("$", "").replace(",", "").strip()
+        try:
+            return float(x or 0)
+        except Exception:
+            return 0.0
+
+    df["Final Price"] = df["Final Price"].apply(clean_price)
+
+    df = df[df["SKU#"].notna() & (df["SKU#"].str.strip() != "")]
+    df = df[df["Product name"].notna() & (df["Product name"].str.strip() != "")]
+    return df
+
+
+def best_of(fn, source, repeat):
+    best = float("inf")
+    out = None
+    for _ in range(repeat):
+        df = source.copy()
+        start = time.perf_counter()
+        out = fn(df)
+        best = min(best, time.perf_counter() - start)
+    return best, out
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--rows", type=int, default=100_000)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    source = make_products(args.rows)
+    print(f"📦 {len(source):,} synthetic products, best of {args.repeat}")
+
+    old_s, old_df = best_of(legacy_normalize, source, args.repeat)
+    new_s, new_df = best_of(lambda df: normalize_catalog(df, fix_separators=True), source, args.repeat)
+
+    print(f"  legacy (per-row apply): {old_s * 1000:9.1f} ms  ({len(old_df):,} rows kept)")
+    print(f"  vectorized pipeline:    {new_s * 1000:9.1f} ms  ({len(new_df):,} rows kept)")
+    print(f"  speedup: {old_s / new_s:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,106 @@
+"""
+Benchmark: Import Time
+----------------------
+Measures what a fresh server process imports before the login page can paint
+(the module-level imports of thrive.py) against importing every tool up
+front, plus the cost of each tool module on its own. Every measurement runs
+in a new interpreter with ``-X importtime``, with streamlit already imported
+since every page needs it.
+
+Usage:
+    python benchmarks/bench_import_time.py [--repeat 5] [--top 8]
+"""
+
+import argparse
+import ast
+import os
+import re
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+BASELINE = "streamlit"
+TOOL_MODULES = ["inventory_management", "email_sender", "product_merger", "sales_analytics"]
+
+_LINE = re.compile(r"^import time:\s+(\d+) \|\s+(\d+) \| ( *)(\S+)$")
+
+
+def _calls(node, name):
+    return any(isinstance(n, ast.Call) and getattr(n.func, "id", None) == name for n in ast.walk(node))
+
+
+def login_imports(path=os.path.join(ROOT, "thrive.py")):
+    """Modules thrive.py imports at module level before its authentication check."""
+    with open(path, encoding="utf-8") as f:
+        tree = ast.parse(f.read())
+    modules = []
+    for node in tree.body:
+        if _calls(node, "check_authentication"):
+            break
+        if isinstance(node, ast.Import):
+            modules += [alias.name for alias in node.names]
+        elif isinstance(node, ast.ImportFrom) and node.module:
+            modules.append(node.module)
+    return [m for m in dict.fromkeys(modules) if m != BASELINE]
+
+
+def import_profile(modules):
+    """(total ms, [(cumulative ms, package)] for their direct imports) in a fresh interpreter."""
+    code = f"import {BASELINE}; " + "; ".join(f"import {m}" for m in modules)
+    result = subprocess.run([sys.executable, "-X", "importtime", "-c", code],
+                            cwd=ROOT, capture_output=True, text=True)
+    if result.returncode:
+        raise RuntimeError(result.stderr.strip().splitlines()[-1])
+
+    total = 0.0
+    direct = []
+    seen_baseline = False
+    for line in result.stderr.splitlines():
+        match = _LINE.match(line)
+        if not match:
+            continue
+        _, cumulative, indent, name = match.groups()
+        ms = int(cumulative) / 1000
+        if seen_baseline and len(indent) == 0:
+            total += ms
+        elif seen_baseline and len(indent) == 2:
+            direct.append((ms, name))
+        seen_baseline = seen_baseline or (name == BASELINE and not indent)
+    # Nested imports are listed before their parent, so the top-level
+    # entries after the baseline add up to the whole cost of ``modules``
+    return total, direct
+
+
+def best_profile(modules, repeat):
+    return min((import_profile(modules) for _ in range(repeat)), key=lambda p: p[0])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--top", type=int, default=8, help="heaviest imports to list per measurement")
+    args = parser.parse_args()
+
+    login = login_imports()
+    print(f"⏱️  import time after `import {BASELINE}`, best of {args.repeat}")
+    print(f"  login page imports: {', '.join(login)}")
+
+    lazy_ms, lazy = best_profile(login, args.repeat)
+    eager_ms, eager = best_profile(login + TOOL_MODULES, args.repeat)
+    print(f"  login page (lazy tools):   {lazy_ms:8.1f} ms")
+    print(f"  all tools imported eagerly: {eager_ms:7.1f} ms")
+    print(f"  saved before first paint:  {eager_ms - lazy_ms:8.1f} ms")
+
+    print("\n  heaviest dependencies when every tool is loaded:")
+    for ms, name in sorted(eager, reverse=True)[:args.top]:
+        print(f"    {ms:8.1f} ms  {name}")
+
+    print("\n  per tool (cold, on its own):")
+    for module in TOOL_MODULES:
+        ms, entries = best_profile([module], args.repeat)
+        heavy = ", ".join(f"{name} {m:.0f} ms" for m, name in sorted(entries, reverse=True)[:3])
+        print(f"    {module:22s} {ms:8.1f} ms  ({heavy})")
+
+
+if __name__ == "__main__":
+    main()
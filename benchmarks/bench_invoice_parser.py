@@ -0,0 +1,145 @@
+"""
+Benchmark: Invoice Parser
+-------------------------
+Generates multi-page synthetic VE Wholesale invoices (a ruled item table per
+page, or plain text lines with --no-rules) and times the header-only legacy
+scan against ``parse_invoice_pdf``, checking every line item is recovered.
+
+Usage:
+    python benchmarks/bench_invoice_parser.py [--pages 1 10 50] [--items 30] [--no-rules]
+"""
+
+import argparse
+import io
+import os
+import sys
+import time
+
+import pdfplumber
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from inventory_management import parse_invoice_pdf  # noqa: E402
+
+_COLUMNS = [(40, "Item"), (250, "SKU#"), (340, "Unit price"), (430, "Quantity"), (500, "Amount")]
+_RIGHT_EDGE = 572
+
+
+def _escape(text):
+    return text.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)")
+
+
+def _page_stream(page_no, n_pages, items, ruled):
+    ops = []
+
+    def text(x, y, s, size=9):
+        ops.append(f"BT /F1 {size} Tf {x} {y} Td ({_escape(s)}) Tj ET")
+
+    text(40, 760, "VE Wholesale Marketplace", 12)
+    text(40, 740, f"Invoice number: 90{page_no:03d}77" if page_no == 1 else f"Page {page_no} of {n_pages}")
+    if page_no == 1:
+        text(40, 726, "Invoice date: 01/15/2026")
+        text(40, 712, "Due date: 02/14/2026")
+        text(40, 698, "Invoice total: $1,234.56")
+        text(40, 684, "Order placed by: Thrive Wellness")
+
+    row_h = 16
+    top = 660
+    rows = [[label for _, label in _COLUMNS]] + items
+    for r, cells in enumerate(rows):
+        y = top - r * row_h
+        for (x, _), cell in zip(_COLUMNS, cells):
+            text(x + 3, y - 11, str(cell))
+    if ruled:
+        bottom = top - len(rows) * row_h
+        for r in range(len(rows) + 1):
+            y = top - r * row_h
+            ops.append(f"{_COLUMNS[0][0]} {y} m {_RIGHT_EDGE} {y} l S")
+        for x in [x for x, _ in _COLUMNS] + [_RIGHT_EDGE]:
+            ops.append(f"{x} {top} m {x} {bottom} l S")
+    return "\n".join(ops).encode("latin-1")
+
+
+def make_invoice_pdf(n_pages, items_per_page, ruled=True):
+    """Minimal hand-written PDF; returns (bytes, expected line items)."""
+    expected = []
+    streams = []
+    for p in range(1, n_pages + 1):
+        items = []
+        for i in range(items_per_page):
+            n = (p - 1) * items_per_page + i
+            qty = 1 + n % 24
+            price = 2.5 + (n % 17)
+            items.append([f"Product {n} Candle", f"TH-{n:05d}", f"${price:.2f}", str(qty), f"${price * qty:,.2f}"])
+            expected.append((f"TH-{n:05d}", qty))
+        streams.append(_page_stream(p, n_pages, items, ruled))
+
+    objects = [b"<< /Type /Catalog /Pages 2 0 R >>", None, b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>"]
+    kids = []
+    for stream in streams:
+        content_id = len(objects) + 1
+        objects.append(b"<< /Length %d >>\nstream\n" % len(stream) + stream + b"\nendstream")
+        page_id = len(objects) + 1
+        objects.append(
+            b"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] "
+            b"/Resources << /Font << /F1 3 0 R >> >> /Contents %d 0 R >>" % content_id
+        )
+        kids.append(page_id)
+    objects[1] = b"<< /Type /Pages /Kids [%s] /Count %d >>" % (
+        b" ".join(b"%d 0 R" % k for k in kids), len(kids))
+
+    out = io.BytesIO()
+    out.write(b"%PDF-1.4\n")
+    offsets = []
+    for i, body in enumerate(objects, start=1):
+        offsets.append(out.tell())
+        out.write(b"%d 0 obj\n" % i + body + b"\nendobj\n")
+    xref = out.tell()
+    out.write(b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1))
+    for off in offsets:
+        out.write(b"%010d 00000 n \n" % off)
+    out.write(b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (len(objects) + 1, xref))
+    return out.getvalue(), expected
+
+
+def legacy_header_scan(pdf_bytes):
+    """The old pdf_to_csv_converter text pass (quadratic ``text +=``, header lines only)."""
+    text = ""
+    with pdfplumber.open(io.BytesIO(pdf_bytes)) as pdf:
+        for page in pdf.pages:
+            page_text = page.extract_text()
+            if page_text:
+                text += page_text + "\n"
+    return [l.strip() for l in text.split("\n") if l.strip()]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--pages", type=int, nargs="+", default=[1, 10, 50])
+    parser.add_argument("--items", type=int, default=30, help="line items per page")
+    parser.add_argument("--no-rules", action="store_true", help="omit table rules (exercises the text fallback)")
+    args = parser.parse_args()
+
+    print(f"🧾 {args.items} items/page, {'text lines' if args.no_rules else 'ruled tables'}")
+    for n_pages in args.pages:
+        pdf_bytes, expected = make_invoice_pdf(n_pages, args.items, ruled=not args.no_rules)
+
+        start = time.perf_counter()
+        legacy_header_scan(pdf_bytes)
+        legacy_s = time.perf_counter() - start
+
+        start = time.perf_counter()
+        parsed = parse_invoice_pdf(io.BytesIO(pdf_bytes))
+        new_s = time.perf_counter() - start
+
+        got = [(it["sku"], it["quantity"]) for it in parsed["items"]]
+        status = "✅" if got == expected else f"❌ {len(got)}/{len(expected)} items"
+        print(
+            f"  {n_pages:4d} pages: legacy header scan {legacy_s * 1000:8.1f} ms (0 items) | "
+            f"parse_invoice_pdf {new_s * 1000:8.1f} ms ({len(got)} items, "
+            f"{n_pages / new_s:6.1f} pages/s) {status}"
+        )
+
+
+if __name__ == "__main__":
+    main()
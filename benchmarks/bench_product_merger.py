@@ -0,0 +1,245 @@
+"""
+Benchmark: Product Merger Aggregation
+-------------------------------------
+Times building "Product(s) Ordered & Quantity" plus the output frame, the
+original way (``groupby().apply`` over ``iterrows``, column-by-column output)
+against the vectorized ``product_merger`` path, on synthetic Shopify exports.
+
+With --stream, writes the exports to disk padded with the extra columns a real
+Shopify export carries, and compares peak RSS of reading both files whole
+against the chunked streaming merger (each run in its own process).
+
+Usage:
+    python benchmarks/bench_product_merger.py [--rows 10000 100000 1000000] [--max-legacy-rows 1000000]
+    python benchmarks/bench_product_merger.py --stream [--rows 500000 1000000 2000000] [--engine c|pyarrow]
+"""
+
+import argparse
+import multiprocessing
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import product_merger  # noqa: E402
+from product_merger import aggregate_products, build_merged_output  # noqa: E402
+
+_EXTRA_COLUMNS = 30  # Shopify exports carry dozens of columns the merger never reads
+
+
+def make_exports(line_items, items_per_order=3, seed=11):
+    """Synthetic (orders_df, products_df) with ``line_items`` product rows."""
+    rng = np.random.default_rng(seed)
+    n_orders = max(1, line_items // items_per_order)
+    transactions = np.array([f"#{100000 + i}" for i in range(n_orders)])
+    products = pd.DataFrame({
+        "Transaction no": transactions[rng.integers(0, n_orders, line_items)],
+        "Item name": np.array([f"Product {i} Candle" for i in range(500)])[rng.integers(0, 500, line_items)],
+        "Quantity": rng.integers(1, 6, line_items).astype(float),
+    })
+    orders = pd.DataFrame({
+        "Transaction no": np.repeat(transactions, 2),  # Shopify repeats order rows
+        "Date": "2026-01-15",
+        "Billing name": "Jane Doe",
+        "Billing company": "",
+        "Billing city": "Aurora",
+        "Billing state/province": "IL",
+        "Customer email": "jane@example.com",
+        "Subtotal": 10.0,
+        "Discount": 0.0,
+        "Shipping": 0.0,
+        "Tax": 0.8,
+        "Total": 10.8,
+    })
+    return orders, products
+
+
+def legacy_merge(orders_df, products_df):
+    """The pre-vectorization show_product_merger body, kept verbatim for comparison."""
+    products_df["Transaction no"] = products_df["Transaction no"].astype(str).str.strip()
+    products_df["Item name"] = products_df["Item name"].astype(str).str.strip()
+    products_df["Quantity"] = products_df["Quantity"].fillna(1)
+
+    def aggregate_items(group):
+        parts = []
+        for _, row in group.iterrows():
+            qty = row["Quantity"]
+            try:
+                qty = int(float(qty))
+            except (ValueError, TypeError):
+                qty = row["Quantity"]
+            parts.append(f"{row['Item name']} x{qty}")
+        return ", ".join(parts)
+
+    products_grouped = (
+        products_df.groupby("Transaction no")
+        .apply(aggregate_items)
+        .reset_index()
+    )
+    products_grouped.columns = ["Transaction no", "Product(s) Ordered & Quantity"]
+
+    orders_df["Transaction no"] = orders_df["Transaction no"].astype(str).str.strip()
+    orders_df = orders_df.drop_duplicates(subset="Transaction no")
+    merged = orders_df.merge(products_grouped, on="Transaction no", how="left")
+
+    output = pd.DataFrame()
+    output["Web or Booth"] = "N/A"
+    output["Transaction No."] = merged["Transaction no"]
+    output["Purchase Date"] = merged["Date"]
+    output["Customer Name"] = merged["Billing name"]
+    output["Company"] = merged["Billing company"]
+    output["City"] = merged["Billing city"]
+    output["State"] = merged["Billing state/province"]
+    output["Customer E-Mail"] = merged["Customer email"]
+    output["Product(s) Ordered & Quantity"] = merged["Product(s) Ordered & Quantity"]
+    output["Order Subtotal"] = merged["Subtotal"]
+    output["Discount Applied"] = merged["Discount"]
+    output["Shipping"] = merged["Shipping"]
+    output["Tax"] = merged["Tax"]
+    output["Order Total"] = merged["Total"]
+    output["Shipping Status"] = ""
+    output["Notes"] = ""
+    return output
+
+
+def vectorized_merge(orders_df, products_df):
+    products_grouped = aggregate_products(products_df)
+    orders_df["Transaction no"] = orders_df["Transaction no"].astype(str).str.strip()
+    orders_df = orders_df.drop_duplicates(subset="Transaction no")
+    return build_merged_output(orders_df, products_grouped)
+
+
+def timed(fn, orders, products):
+    start = time.perf_counter()
+    out = fn(orders.copy(), products.copy())
+    return time.perf_counter() - start, out
+
+
+def write_exports(rows, directory):
+    orders, products = make_exports(rows)
+    for frame in (orders, products):
+        for i in range(_EXTRA_COLUMNS):
+            frame[f"Extra {i}"] = "lorem ipsum dolor"
+    orders_path = os.path.join(directory, "orders.csv")
+    products_path = os.path.join(directory, "products.csv")
+    orders.to_csv(orders_path, index=False)
+    products.to_csv(products_path, index=False)
+    return orders_path, products_path
+
+
+def _read_whole(orders_path, products_path, engine):
+    orders_df = pd.read_csv(orders_path)
+    products_grouped = aggregate_products(pd.read_csv(products_path))
+    orders_df["Transaction no"] = orders_df["Transaction no"].astype(str).str.strip()
+    orders_df = orders_df.drop_duplicates(subset="Transaction no")
+    output = build_merged_output(orders_df, products_grouped)
+    return len(output), len(output.to_csv(index=False).encode("utf-8"))
+
+
+def _streaming(orders_path, products_path, engine):
+    with open(orders_path, "rb") as orders_file, open(products_path, "rb") as products_file:
+        orders_columns = product_merger.read_csv_columns(orders_file)
+        products_columns = product_merger.read_csv_columns(products_file)
+        products = product_merger.aggregate_products_chunked(
+            products_file, {c: products_columns[c] for c in product_merger.REQUIRED_PRODUCTS}, engine)
+        with tempfile.SpooledTemporaryFile(max_size=product_merger.SPOOL_MAX_MEMORY) as out:
+            rows, _ = product_merger.stream_merged_csv(
+                orders_file, {c: orders_columns[c] for c in product_merger.REQUIRED_ORDERS}, products, out, engine)
+            return rows, out.tell()
+
+
+def _peak_rss_mb():
+    # VmHWM is per address space; ru_maxrss would carry over the parent's peak
+    with open("/proc/self/status") as f:
+        for line in f:
+            if line.startswith("VmHWM:"):
+                return int(line.split()[1]) / 1024
+    return float("nan")
+
+
+def _child(fn, args, queue):
+    start = time.perf_counter()
+    rows, size = fn(*args)
+    elapsed = time.perf_counter() - start
+    peak_mb = _peak_rss_mb()
+    queue.put((elapsed, peak_mb, rows, size))
+
+
+def in_child(fn, *args):
+    """Run ``fn`` in a fresh process; returns (seconds, peak RSS MB, rows, output bytes)."""
+    ctx = multiprocessing.get_context("spawn")
+    queue = ctx.Queue()
+    proc = ctx.Process(target=_child, args=(fn, args, queue))
+    proc.start()
+    proc.join()
+    if proc.exitcode != 0:  # e.g. OOM-killed reading a large export whole
+        return None
+    return queue.get()
+
+
+def run_stream(rows_list, engine):
+    print(f"💾 streaming merger ({engine or product_merger.csv_engine()} engine), peak RSS per run")
+    with tempfile.TemporaryDirectory() as directory:
+        for rows in rows_list:
+            orders_path, products_path = write_exports(rows, directory)
+            input_mb = (os.path.getsize(orders_path) + os.path.getsize(products_path)) / 1e6
+            whole = in_child(_read_whole, orders_path, products_path, engine)
+            stream = in_child(_streaming, orders_path, products_path, engine)
+            line = f"  {rows:>9,} line items ({input_mb:7.1f} MB of CSV): "
+            line += "read whole (killed)" if whole is None else f"read whole {whole[0]:6.2f} s / {whole[1]:7.1f} MB"
+            line += " | streaming (killed)" if stream is None else f" | streaming {stream[0]:6.2f} s / {stream[1]:7.1f} MB"
+            if whole and stream:
+                line += " | ✅ same size" if whole[2:] == stream[2:] else " | ❌ differs"
+            print(line, flush=True)
+
+
+# The legacy body assigns "N/A" while its output frame is still empty, so the
+# column comes out blank; the merger writes the intended "N/A"
+KNOWN_LEGACY_DIFFERENCES = ["Web or Booth"]
+
+
+def same_output(old_out, new_out):
+    """Whether both paths produce the same merged frame, apart from the known legacy quirk.
+
+    The index is ignored: the merger keeps the deduplicated orders' index.
+    """
+    old_out = old_out.drop(columns=KNOWN_LEGACY_DIFFERENCES).reset_index(drop=True)
+    new_out = new_out.drop(columns=KNOWN_LEGACY_DIFFERENCES).reset_index(drop=True)
+    try:
+        pd.testing.assert_frame_equal(old_out, new_out)
+    except AssertionError:
+        return False
+    return True
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--rows", type=int, nargs="+", default=None)
+    parser.add_argument("--max-legacy-rows", type=int, default=1_000_000,
+                        help="skip the (slow) legacy path above this many line items")
+    parser.add_argument("--stream", action="store_true", help="compare peak memory against the streaming merger")
+    parser.add_argument("--engine", choices=["c", "pyarrow"], default=None)
+    args = parser.parse_args()
+
+    if args.stream:
+        run_stream(args.rows or [500_000, 1_000_000, 2_000_000], args.engine)
+        return
+
+    for rows in args.rows or [10_000, 100_000, 1_000_000]:
+        orders, products = make_exports(rows)
+        new_s, new_out = timed(vectorized_merge, orders, products)
+        line = f"  {rows:>9,} line items: vectorized {new_s:7.2f} s"
+        if rows <= args.max_legacy_rows:
+            old_s, old_out = timed(legacy_merge, orders, products)
+            same = same_output(old_out, new_out)
+            line += f" | legacy {old_s:7.2f} s | speedup {old_s / new_s:6.1f}x | {'✅ same' if same else '❌ differs'}"
+        print(line)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,266 @@
+"""
+Product Catalog
+---------------
+Shared normalization for product rows loaded from Supabase (the products
+table for inventory management, the inventory table for the email sender)
+and the typed, indexed ``Catalog`` snapshot built from them.
+Everything is column-wise: no per-row Python in the hot path.
+"""
+
+import os
+import re
+import threading
+
+import pandas as pd
+import streamlit as st
+
+CATALOG_COLUMNS = ["Category", "Product name", "Product Status", "SKU#", "Final Price"]
+LEGACY_PRODUCTS_CSV = "PPwP.csv"
+
+# Patterns are kept as strings: pandas hands string patterns to its native
+# (Arrow) regex kernels, while a compiled re.Pattern forces a per-row fallback.
+# "CandlexMint" / "Candle  x Mint" -> "Candle x Mint"
+_X_SEPARATOR_PATTERN = r"(\w)\s*x\s*([A-Z])"
+_PRICE_JUNK_PATTERN = r"[$,\s]"
+
+
+def _clean_text(col):
+    return col.fillna("").astype(str).str.strip()
+
+
+def clean_price_column(col):
+    """Vectorized price parsing: strips ``$``/``,``; blanks and junk become 0.0."""
+    if pd.api.types.is_numeric_dtype(col):
+        return pd.to_numeric(col, errors="coerce").fillna(0.0).astype(float)
+    cleaned = col.fillna("").astype(str).str.replace(_PRICE_JUNK_PATTERN, "", regex=True)
+    return pd.to_numeric(cleaned, errors="coerce").fillna(0.0).astype(float)
+
+
+def normalize_catalog(df, fix_separators=False):
+    """Normalize a frame already renamed to ``CATALOG_COLUMNS``.
+
+    Missing catalog columns are added empty, text columns are stripped, prices
+    are parsed, and rows without a SKU or name are dropped with a single
+    combined mask. ``fix_separators`` also rewrites the " x " separator in
+    product names ("CandlexMint" -> "Candle x Mint"); only the products table
+    needs it, and it would mangle names like "Detox Bath Salt".
+    """
+    for col in CATALOG_COLUMNS:
+        if col not in df.columns:
+            df[col] = ""
+
+    df["Product name"] = _clean_text(df["Product name"])
+    if fix_separators:
+        df["Product name"] = df["Product name"].str.replace(_X_SEPARATOR_PATTERN, r"\1 x \2", regex=True)
+    df["Category"] = _clean_text(df["Category"])
+    df["SKU#"] = _clean_text(df["SKU#"])
+    df["Final Price"] = clean_price_column(df["Final Price"])
+
+    keep = (df["SKU#"] != "") & (df["Product name"] != "")
+    if keep.all():
+        return df
+    return df.loc[keep]
+
+
+def _as_category(col):
+    return _clean_text(col).astype("category")
+
+
+def _as_int(col):
+    return pd.to_numeric(col, errors="coerce").fillna(0).astype("int64")
+
+
+def typed_inventory_frame(df):
+    """Give an inventory-table frame compact dtypes (categorical text, int stock, float price)."""
+    if df.empty:
+        return df
+    for col in ("category", "status"):
+        if col in df.columns:
+            df[col] = _as_category(df[col])
+    for col in ("stock_bought", "stock_left"):
+        if col in df.columns:
+            df[col] = _as_int(df[col])
+    if "price" in df.columns:
+        df["price"] = clean_price_column(df["price"])
+    return df
+
+
+_version_lock = threading.Lock()
+_data_versions = {}  # table -> number of writes this process has made to it
+
+
+def data_version(table):
+    """Write counter for ``table``; shared caches keyed on it see every in-app write."""
+    return _data_versions.get(table, 0)
+
+
+def bump_data_version(table):
+    """Record a write to ``table``, so caches keyed on its version rebuild."""
+    with _version_lock:
+        _data_versions[table] = _data_versions.get(table, 0) + 1
+        return _data_versions[table]
+
+
+_legacy_lock = threading.Lock()
+_legacy_cache = {}  # path -> (mtime, or None if missing, {legacy name: sku})
+
+
+def load_legacy_name_index(path=LEGACY_PRODUCTS_CSV):
+    """Legacy product name -> SKU from PPwP.csv (Phased Products with Prices).
+
+    Read once and re-read only when the file's mtime changes. The returned dict
+    is shared: treat it as read-only. A missing file yields ``{}``, and so does
+    one that can't be read or parsed (with a warning, once per file version).
+    """
+    try:
+        mtime = os.path.getmtime(path)
+    except OSError:
+        mtime = None
+    with _legacy_lock:
+        cached = _legacy_cache.get(path)
+        if cached and cached[0] == mtime:
+            return cached[1]
+        # The same dict is returned until the file changes, so callers can key caches on its identity
+        if mtime is None:
+            _legacy_cache[path] = (None, {})
+            return _legacy_cache[path][1]
+        try:
+            df = pd.read_csv(path, usecols=["Product name", "SKU#"], dtype=str)
+        except (OSError, ValueError) as e:  # ValueError covers parse, encoding and missing-column errors
+            st.warning(f"Legacy product names could not be loaded from {os.path.basename(path)}: {e}")
+            mapping = {}
+        else:
+            names = _clean_text(df["Product name"])
+            skus = _clean_text(df["SKU#"])
+            keep = (names != "") & (skus != "")
+            mapping = dict(zip(names[keep], skus[keep]))
+        _legacy_cache[path] = (mtime, mapping)
+        return mapping
+
+
+class ProductMatcher:
+    """One compiled pattern over every product name, for parsing order strings.
+
+    Names are tried longest first, so "Candle x Mint" wins over "Candle".
+    An optional ``x2`` / ``×2`` / ``*2`` suffix sets the quantity. Matching is
+    case-insensitive; ``fallback_name_to_sku`` (legacy names) only applies
+    where no name in ``name_to_sku`` lowercases to the same text.
+    """
+
+    def __init__(self, name_to_sku, fallback_name_to_sku=None):
+        self._sku_by_lower = {}
+        for mapping in (fallback_name_to_sku or {}, name_to_sku):
+            for name, sku in mapping.items():
+                name = str(name).strip() if name else ""
+                if name and sku:
+                    self._sku_by_lower[name.lower()] = sku
+        names = sorted({str(n).strip() for m in (name_to_sku, fallback_name_to_sku or {}) for n in m
+                        if n and str(n).strip()}, key=len, reverse=True)
+        self._pattern = None
+        if names:
+            alternatives = "|".join(re.escape(n) for n in names)
+            self._pattern = re.compile(rf"({alternatives})(?:\s*[x×\*]\s*(\d+))?", re.IGNORECASE)
+
+    def parse(self, text):
+        """``{sku: qty}`` for every product name found in ``text``."""
+        cart = {}
+        if self._pattern is None or not text or str(text).lower() in ["nan", "none", "null", ""]:
+            return cart
+        for match in self._pattern.finditer(str(text)):
+            sku = self._sku_by_lower.get(match.group(1).lower())
+            if sku:
+                qty = int(match.group(2)) if match.group(2) else 1
+                cart[sku] = cart.get(sku, 0) + qty
+        return cart
+
+
+class Catalog:
+    """Typed, indexed product catalog snapshot shared by every tool.
+
+    Built from a frame already run through ``normalize_catalog``. Category and
+    status are categorical, stock columns (when present) are int64, prices are
+    float64, and lookups by SKU, exact name or lowercased name are dict hits.
+    """
+
+    def __init__(self, frame):
+        df = frame.reset_index(drop=True).copy()
+        df["Category"] = _as_category(df["Category"])
+        df["Product Status"] = _as_category(df["Product Status"])
+        df["Final Price"] = clean_price_column(df["Final Price"])
+        for col in ("stock_bought", "stock_left"):
+            if col in df.columns:
+                df[col] = _as_int(df[col])
+        self.frame = df
+
+        skus = df["SKU#"].tolist()
+        names = df["Product name"].tolist()
+        self.sku_to_name = dict(zip(skus, names))
+        self.name_to_sku = {name: sku for sku, name in self.sku_to_name.items()}
+        self.name_lower_to_sku = {name.lower(): sku for name, sku in self.name_to_sku.items()}
+        self.sku_to_price = dict(zip(skus, df["Final Price"].tolist()))
+        self._row_by_sku = {sku: i for i, sku in enumerate(skus)}
+        self._search_index = None
+        self._matcher = None
+        self._matcher_legacy = None
+
+    def __len__(self):
+        return len(self.frame)
+
+    def __contains__(self, sku):
+        return sku in self._row_by_sku
+
+    @property
+    def empty(self):
+        return self.frame.empty
+
+    def name(self, sku, default=None):
+        return self.sku_to_name.get(sku, sku if default is None else default)
+
+    def price(self, sku, default=0.0):
+        return self.sku_to_price.get(sku, default)
+
+    def sku_for_name(self, name):
+        """SKU for an exact name, falling back to a case-insensitive match."""
+        name = str(name).strip()
+        return self.name_to_sku.get(name) or self.name_lower_to_sku.get(name.lower())
+
+    def resolve_skus(self, names):
+        """SKU per name, or None; aligned with ``names`` (a Series).
+
+        Names are matched as given (stripped), then with the " x " separator
+        normalized ("CandlexMint" -> "Candle x Mint"); each exactly,
+        case-insensitively, and against legacy PPwP.csv names. Each distinct
+        name is looked up once.
+        """
+        codes, uniques = pd.factorize(names.fillna(""))
+        stripped = _clean_text(pd.Series(uniques, dtype=object))
+        separated = stripped.str.replace(_X_SEPARATOR_PATTERN, r"\1 x \2", regex=True)
+        legacy = load_legacy_name_index()
+        resolved = pd.Series([self.sku_for_name(a) or legacy.get(a) or self.sku_for_name(b) or legacy.get(b)
+                              for a, b in zip(stripped, separated)], dtype=object)
+        return pd.Series(resolved.to_numpy()[codes], index=names.index, dtype=object)
+
+    def row(self, sku):
+        """Catalog row for ``sku`` as a Series, or None."""
+        i = self._row_by_sku.get(sku)
+        return None if i is None else self.frame.iloc[i]
+
+    @property
+    def matcher(self):
+        """Order-string matcher over current names plus legacy PPwP.csv names.
+
+        Current catalog names win when a legacy name collides, including
+        case-insensitively. Rebuilt only when the legacy file changes.
+        """
+        legacy = load_legacy_name_index()
+        if self._matcher is None or self._matcher_legacy is not legacy:
+            self._matcher = ProductMatcher(self.name_to_sku, legacy)
+            self._matcher_legacy = legacy
+        return self._matcher
+
+    @property
+    def search_index(self):
+        if self._search_index is None:
+            from search_index import SearchIndex
+            self._search_index = SearchIndex(self.frame["Product name"].tolist(), self.frame["SKU#"].tolist())
+        return self._search_index
@@ -0,0 +1,42 @@
+"""
+Concurrent Page Loads
+---------------------
+Runs a page's independent data loaders at the same time, so a cold page waits
+for the slowest query instead of the sum of all of them. Loaders run on a
+shared thread pool with the calling script's run context attached, so
+``st.cache_data``, ``st.session_state`` and ``st.error``/``st.stop`` inside
+them behave as if they were called from the script itself.
+"""
+
+from concurrent.futures import ThreadPoolExecutor, wait
+
+import streamlit as st
+from streamlit.runtime.scriptrunner import add_script_run_ctx, get_script_run_ctx
+
+LOADER_THREADS = 4
+
+_pool = ThreadPoolExecutor(max_workers=LOADER_THREADS, thread_name_prefix="page-load")
+
+
+def _with_ctx(ctx, loader):
+    def run():
+        add_script_run_ctx(ctx=ctx)
+        return loader()
+    return run
+
+
+def load_concurrently(*loaders):
+    """Call every zero-argument ``loader`` in parallel; returns their results in order.
+
+    Exceptions are re-raised in the caller, in loader order; ``st.stop()`` in a
+    loader stops the script run.
+    """
+    ctx = get_script_run_ctx()
+    futures = [_pool.submit(_with_ctx(ctx, loader)) for loader in loaders]
+    wait(futures)
+    if any(future.exception() for future in futures):
+        # st.stop() in a worker only requests the stop (the loader then fails on
+        # whatever follows it); an element write here is the script thread's
+        # yield point, so the run stops as it would have without the pool
+        st.empty()
+    return [future.result() for future in futures]
@@ -2,21 +2,21 @@ import streamlit as st
 import pandas as pd
 import os
 import json
-import re
 import time
 import smtplib
 import io
-import requests
 from email.mime.multipart import MIMEMultipart
 from email.mime.text import MIMEText
 from email.mime.image import MIMEImage
-from supabase_client import get_authed_supabase
+from supabase_client import get_authed_supabase, supabase_execute
 from email_templates import get_fulfillment_email_html, generate_items_html
+from catalog import Catalog, ProductMatcher, bump_data_version, data_version, normalize_catalog
+import perf
 
 def get_image_url_from_supabase(sku, supabase):
     """Get image URL from inventory table for a given SKU"""
     try:
-        res = supabase.table("inventory").select("image_url").eq("sku", sku).execute()
+        res = supabase_execute(supabase.table("inventory").select("image_url").eq("sku", sku))
         if hasattr(res, 'data') and res.data and res.data[0].get('image_url'):
             image_url = res.data[0]['image_url']
             if image_url and image_url != 'N/A':
@@ -27,6 +27,8 @@ def get_image_url_from_supabase(sku, supabase):
 
 def fetch_image_from_url(url):
     """Download image from URL and return bytes"""
+    import requests
+
     try:
         response = requests.get(url, timeout=10)
         if response.status_code == 200:
@@ -35,16 +37,15 @@ def fetch_image_from_url(url):
         pass
     return None
 
-@st.cache_data(ttl=600)
-def load_products_from_supabase():
-    """Load products from inventory table for email sender"""
-    try:
-        supabase = get_authed_supabase()
-        res = supabase.table("inventory").select("*").execute()
-        rows = getattr(res, "data", None) or []
-    except Exception as e:
-        st.error(f"Unable to load inventory from Supabase: {e}")
-        return pd.DataFrame()
+@st.cache_data(ttl=600, max_entries=2)
+def load_products_from_supabase(version=0):
+    """Load products from inventory table for email sender, fresh for the given "inventory" data version.
+
+    Raises if Supabase can't be read, so a failed load is never cached.
+    """
+    supabase = get_authed_supabase()
+    res = supabase_execute(supabase.table("inventory").select("*"))
+    rows = getattr(res, "data", None) or []
 
     df = pd.DataFrame(rows)
     if df.empty:
@@ -58,29 +59,43 @@ def load_products_from_supabase():
         "price": "Final Price",
     })
 
-    required_cols = ["Category", "Product name", "Product Status", "SKU#", "Final Price"]
-    for col in required_cols:
-        if col not in df.columns:
-            df[col] = ""
-    
     if 'image_url' not in df.columns:
         df['image_url'] = ""
 
-    df["Product name"] = df["Product name"].astype(str).str.strip()
-    df["Category"] = df["Category"].astype(str).str.strip()
-    df["SKU#"] = df["SKU#"].astype(str).str.strip()
-    
-    if "Final Price" in df.columns:
-        df["Final Price"] = df["Final Price"].fillna(0.0)
-    
-    return df
+    return normalize_catalog(df)
+
+@st.cache_resource(ttl=600, max_entries=2, show_spinner=False)
+def _inventory_catalog(version):
+    master = load_products_from_supabase(version)
+    return None if master.empty else Catalog(master)
+
+def load_inventory_catalog():
+    """Typed catalog of the inventory table, or None if it is empty or can't be loaded.
+
+    Built once per load and shared by every session and tool; inventory
+    writes bump the data version, so it is rebuilt after each of them. A
+    failed load shows an error and is retried on the next call.
+    """
+    try:
+        return _inventory_catalog(data_version("inventory"))
+    except Exception as e:
+        st.error(f"Unable to load inventory from Supabase: {e}")
+        return None
+
+def make_queue_order(first_name, email, order_number, order_total, cart, subtract_inventory=True):
+    """An email queue entry (``st.session_state.orders``) for a fulfillment email."""
+    return {
+        "First_Name": first_name, "Email": email, "Order_Number": order_number,
+        "Order_Total": order_total, "Cart": cart, "type": "fulfillment",
+        "subtract_inventory": subtract_inventory
+    }
 
 def subtract_inventory_from_order_supabase(cart, sku_to_name):
     """Subtract items from inventory using Supabase and return before/after stock info"""
     stock_info = []
     try:
         supabase = get_authed_supabase()
-        res = supabase.table("inventory").select("*").execute()
+        res = supabase_execute(supabase.table("inventory").select("*"), snapshot=False)
         rows = getattr(res, "data", None) or []
         if not rows:
             return False, "No inventory data found", []
@@ -108,10 +123,10 @@ def subtract_inventory_from_order_supabase(cart, sku_to_name):
                 elif new_stock == 0: status = "Out of stock"
                 elif new_stock <= 10: status = "Low stock"
                 
-                supabase.table("inventory").update({
+                supabase_execute(supabase.table("inventory").update({
                     "stock_left": new_stock,
                     "status": status
-                }).eq("sku", sku_str).execute()
+                }).eq("sku", sku_str))
                 
                 stock_info.append({
                     "Product": name, "Before": current_stock, "Change": -qty, "After": new_stock
@@ -119,47 +134,48 @@ def subtract_inventory_from_order_supabase(cart, sku_to_name):
                 updates += 1
         
         if updates > 0:
-            st.cache_data.clear()
+            # Inventory caches (the inventory page snapshot, this page's catalog) key on this version
+            bump_data_version("inventory")
             return True, f"Updated {updates} items", stock_info
         return True, "No items matched", []
     except Exception as e:
         return False, f"Supabase error: {str(e)}", []
 
-def parse_product_string(prods, name_to_sku, MASTER):
-    """Extremely robust regex parser for products and quantities"""
-    cart = {}
-    if not prods or str(prods).lower() in ["nan", "none", "null", ""]:
-        return cart
+def parse_product_string(prods, name_to_sku, MASTER, matcher=None):
+    """Extremely robust regex parser for products and quantities
 
-    all_names = [str(n).strip() for n in name_to_sku.keys() if n and str(n).strip()]
-    if not all_names: return cart
-    
-    sorted_names = sorted(all_names, key=len, reverse=True)
-    escaped_names = [re.escape(name) for name in sorted_names]
-    qty_suffix = r"(?:\s*[x×\*]\s*(\d+))?"
-    pattern = re.compile(f"({'|'.join(escaped_names)}){qty_suffix}", re.IGNORECASE)
-    
-    for match in pattern.finditer(str(prods)):
-        name_matched = match.group(1)
-        qty = int(match.group(2)) if match.group(2) else 1
-        canonical_name = next((n for n in sorted_names if n.lower() == name_matched.lower()), name_matched)
-        sku = name_to_sku.get(canonical_name)
-        if sku: cart[sku] = cart.get(sku, 0) + qty
-            
-    return cart
+    Pass the catalog's prebuilt ``matcher`` (which also knows legacy PPwP.csv
+    names) to avoid compiling the name pattern for every order row.
+    """
+    if matcher is None:
+        matcher = ProductMatcher(name_to_sku)
+    return matcher.parse(prods)
+
+@st.fragment
+@perf.timed_function("fragment: product lookup")
+def _render_product_lookup(catalog):
+    """Product search box; typing reruns only this fragment."""
+    lookup = st.text_input("Search", "", key="product_lookup", label_visibility="collapsed",
+                           placeholder="Type a product name or SKU")
+    if lookup:
+        matches = catalog.search_index.rows(catalog.frame, catalog.search_index.search(lookup, limit=25))
+        if matches.empty:
+            st.info("No matching products.")
+        else:
+            st.dataframe(matches[["Product name", "SKU#", "Final Price"]], width='stretch', hide_index=True)
 
 def show_email_sender():
     """Main email sender interface"""
     st.title("Email Sender")
     
-    MASTER = load_products_from_supabase()
-    if MASTER.empty:
+    # Typed catalog with prebuilt lookup dicts, built once per inventory load
+    catalog = load_inventory_catalog()
+    if catalog is None:
         st.error("No products found in inventory.")
         return
-    
-    sku_to_name = dict(zip(MASTER["SKU#"], MASTER["Product name"]))
-    name_to_sku = {v: k for k, v in sku_to_name.items()}
-    sku_to_price = {sku: float(p) if p is not None else 0.0 for sku, p in zip(MASTER["SKU#"], MASTER["Final Price"])}
+    sku_to_name = catalog.sku_to_name
+    name_to_sku = catalog.name_to_sku
+    sku_to_price = catalog.sku_to_price
 
     try:
         SENDER_EMAIL = st.secrets.get("SMTP_SENDER_EMAIL")
@@ -209,6 +225,9 @@ def show_email_sender():
                 st.rerun()
             except Exception as e: st.error(f"Error: {e}")
 
+    with st.expander("🔍 Find Product (Name or SKU)"):
+        _render_product_lookup(catalog)
+
     # The table is the source of truth
     edited_df = st.data_editor(st.session_state[entry_key], num_rows="dynamic", width='stretch', key="entry_editor")
 
@@ -239,16 +258,24 @@ def show_email_sender():
                 ototal_str = str(row.get("Order Total", "0")).strip()
                 try: ototal = float(ototal_str.replace("$", "").replace(",", ""))
                 except: ototal = 0.0
-                cart = parse_product_string(row.get("Products", ""), name_to_sku, MASTER)
+                cart = parse_product_string(row.get("Products", ""), name_to_sku, catalog.frame, matcher=catalog.matcher)
                 if cart:
-                    st.session_state.orders.append({
-                        "First_Name": fname, "Email": email, "Order_Number": onum,
-                        "Order_Total": ototal, "Cart": cart, "type": "fulfillment",
-                        "subtract_inventory": subtract_inv
-                    })
+                    st.session_state.orders.append(make_queue_order(fname, email, onum, ototal, cart, subtract_inv))
                     added += 1
             if added: st.success(f"✅ Added {added} orders!"); st.rerun()
 
+    _render_order_queue(sku_to_name, sku_to_price, SENDER_EMAIL, APP_PASSWORD)
+
+
+def _delete_order(position):
+    if 0 <= position < len(st.session_state.orders):
+        st.session_state.orders.pop(position)
+
+
+@st.fragment
+@perf.timed_function("fragment: email queue")
+def _render_order_queue(sku_to_name, sku_to_price, SENDER_EMAIL, APP_PASSWORD):
+    """Queue list and send loop; deleting an order reruns only this section."""
     if st.session_state.orders:
         st.markdown("---")
         st.subheader(f"Queue – {len(st.session_state.orders)} orders")
@@ -258,38 +285,37 @@ def show_email_sender():
                 items = ", ".join([f"{sku_to_name.get(s, s)}×{q}" for s, q in order["Cart"].items()])
                 st.markdown(f"**#{order['Order_Number']}** – {order['First_Name']} – ${order['Order_Total']:.2f}<br><small>{items}</small>", unsafe_allow_html=True)
             with c2:
-                if st.button("Delete", key=f"del_{i}"):
-                    st.session_state.orders.pop(len(st.session_state.orders)-1-i); st.rerun()
-        
+                st.button("Delete", key=f"del_{i}", on_click=_delete_order, args=(len(st.session_state.orders)-1-i,))
+
         if st.button("SEND ALL EMAILS", type="primary", width='stretch'):
             server = smtplib.SMTP('smtp.gmail.com', 587); server.starttls(); server.login(SENDER_EMAIL, APP_PASSWORD)
             prog = st.progress(0); all_stock_changes = []
+            supabase = get_authed_supabase()
             for idx, order in enumerate(st.session_state.orders):
                 cart, total = order["Cart"], order["Order_Total"]
                 msg = MIMEMultipart(); msg['From'] = f"Thrive <{SENDER_EMAIL}>"; msg['To'] = order['Email']
                 items_list = [{"name": sku_to_name.get(s, s), "price": sku_to_price.get(s, 0), "qty": q} for s, q in cart.items()]
                 items_rows = generate_items_html(items_list)
-                
+
                 msg['Subject'] = f"Thank you for your order #{order['Order_Number']} – Thrive"
                 html = get_fulfillment_email_html(order['First_Name'], order['Order_Number'], items_rows, total)
-                
+
                 # Attach images
-                supabase = get_authed_supabase()
                 for sku, qty in cart.items():
                     for _ in range(qty):
                         url = get_image_url_from_supabase(sku, supabase); data = fetch_image_from_url(url) if url else None
                         if data:
                             img = MIMEImage(data); img.add_header('Content-Disposition', f'attachment; filename="{sku_to_name.get(sku, sku)}.jpg"'); msg.attach(img)
-                
+
                 msg.attach(MIMEText(html, 'html'))
                 if os.path.exists("Thrive.png"):
                     with open("Thrive.png", "rb") as f:
                         logo_img = MIMEImage(f.read()); logo_img.add_header('Content-ID', '<logo>'); msg.attach(logo_img)
-                
+
                 if order.get("subtract_inventory"):
                     success, note, stock_info = subtract_inventory_from_order_supabase(cart, sku_to_name)
                     if success: all_stock_changes.extend(stock_info)
-                
+
                 server.send_message(msg); prog.progress((idx + 1) / len(st.session_state.orders)); time.sleep(0.5)
             server.quit(); st.session_state.orders = []; st.success("✅ All emails sent!")
             if all_stock_changes:
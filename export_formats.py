@@ -0,0 +1,158 @@
+"""
+Export Formats
+--------------
+Download encodings shared by the Product Merger and the inventory table:
+CSV, Parquet (columnar, zstd-compressed) and Excel. Every writer consumes
+an iterator of frames and writes to a binary file, so large reports are
+encoded chunk by chunk instead of as one in-memory string.
+
+Parquet needs pyarrow; ``available_formats`` leaves it out when pyarrow
+isn't installed. Excel uses openpyxl's write-only mode, which streams rows
+to the file rather than building the whole workbook in memory, and spills
+onto extra sheets past Excel's row limit.
+"""
+
+import importlib.util
+import io
+
+import pandas as pd
+
+from catalog import clean_price_column
+
+EXPORT_FORMATS = {
+    "CSV": ("csv", "text/csv"),
+    "Parquet": ("parquet", "application/vnd.apache.parquet"),
+    "Excel": ("xlsx", "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"),
+}
+CSV_CHUNK_ROWS = 100_000
+PARQUET_COMPRESSION = "zstd"
+XLSX_MAX_ROWS = 1_048_576  # Excel's per-sheet row limit, header row included
+
+
+def available_formats():
+    """Export format labels usable in this environment, CSV first."""
+    return [f for f in EXPORT_FORMATS if f != "Parquet" or importlib.util.find_spec("pyarrow")]
+
+
+def file_name(stem, fmt):
+    return f"{stem}.{EXPORT_FORMATS[fmt][0]}"
+
+
+def mime_type(fmt):
+    return EXPORT_FORMATS[fmt][1]
+
+
+def frame_chunks(df, chunk_rows=CSV_CHUNK_ROWS):
+    """Slices of an in-memory frame, so it goes through the same streaming writers."""
+    for start in range(0, max(len(df), 1), chunk_rows):
+        yield df.iloc[start:start + chunk_rows]
+
+
+def csv_chunks(file, numeric_columns=(), chunk_rows=CSV_CHUNK_ROWS):
+    """Read a CSV (binary file) back as text frames, keeping blanks as ``""``.
+
+    ``numeric_columns`` are parsed like catalog prices ("$1,234.00" -> 1234.0)
+    so typed formats store them as numbers; blank cells stay empty.
+    """
+    file.seek(0)
+    for chunk in pd.read_csv(file, dtype=str, keep_default_na=False, chunksize=chunk_rows):
+        for col in numeric_columns:
+            if col in chunk.columns:
+                chunk[col] = clean_price_column(chunk[col]).where(chunk[col].str.strip() != "")
+        yield chunk
+
+
+def _arrow_safe(df):
+    # Object columns can mix str/int/None; give Arrow one type per column
+    obj = df.select_dtypes(include=["object", "category"]).columns
+    if len(obj):
+        df = df.astype({c: "string" for c in obj})
+    return df
+
+
+def write_csv(frames, out):
+    first = True
+    for df in frames:
+        out.write(df.to_csv(index=False, header=first).encode("utf-8"))
+        first = False
+
+
+def write_parquet(frames, out):
+    """Append each frame as a row group of one Parquet file."""
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    writer = None
+    try:
+        for df in frames:
+            table = pa.Table.from_pandas(_arrow_safe(df), preserve_index=False)
+            if writer is None:
+                writer = pq.ParquetWriter(out, table.schema, compression=PARQUET_COMPRESSION)
+            elif table.schema != writer.schema:
+                table = table.cast(writer.schema)
+            writer.write_table(table)
+    finally:
+        if writer is not None:
+            writer.close()
+
+
+def _cell(value):
+    if value is None or value is pd.NA:
+        return None
+    if isinstance(value, float) and value != value:  # NaN
+        return None
+    if isinstance(value, pd.Timestamp):
+        return value.to_pydatetime()
+    return value
+
+
+def _sheet_name(title, number):
+    suffix = "" if number == 1 else f" ({number})"
+    return title[:31 - len(suffix)] + suffix
+
+
+def write_xlsx(frames, out, sheet_title="Sheet1"):
+    """Stream frames into worksheets with openpyxl's write-only mode.
+
+    Rows past Excel's per-sheet limit continue on "<title> (2)", "<title> (3)",
+    ..., each starting with the header row.
+    """
+    from openpyxl import Workbook
+
+    workbook = Workbook(write_only=True)
+    header = None
+    sheets = 0
+    room = 0
+    for df in frames:
+        if header is None:
+            header = [str(c) for c in df.columns]
+        for row in df.itertuples(index=False, name=None):
+            if not room:
+                sheets += 1
+                sheet = workbook.create_sheet(title=_sheet_name(sheet_title, sheets))
+                sheet.append(header)
+                room = XLSX_MAX_ROWS - 1
+            sheet.append([_cell(v) for v in row])
+            room -= 1
+    if not sheets:
+        sheet = workbook.create_sheet(title=_sheet_name(sheet_title, 1))
+        if header is not None:
+            sheet.append(header)
+    workbook.save(out)
+
+
+def write_frames(frames, out, fmt, sheet_title="Sheet1"):
+    """Encode an iterator of frames as ``fmt`` into the binary file ``out``."""
+    if fmt == "Parquet":
+        write_parquet(frames, out)
+    elif fmt == "Excel":
+        write_xlsx(frames, out, sheet_title)
+    else:
+        write_csv(frames, out)
+
+
+def frame_to_bytes(df, fmt, sheet_title="Sheet1"):
+    """An in-memory frame encoded as ``fmt``."""
+    buffer = io.BytesIO()
+    write_frames(frame_chunks(df), buffer, fmt, sheet_title)
+    return buffer.getvalue()
@@ -1,10 +1,25 @@
 import streamlit as st
 import pandas as pd
+import numpy as np
 import os
+import io
+import csv
 import json
 import re
-import pdfplumber
-from supabase_client import get_authed_supabase
+import time
+import hashlib
+import threading
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from supabase_client import get_authed_supabase, supabase_execute
+from concurrent_loads import load_concurrently
+from export_formats import available_formats, file_name, frame_to_bytes, mime_type
+from invoice_cache import InvoiceCache
+from search_index import SearchIndex
+from catalog import (CATALOG_COLUMNS, LEGACY_PRODUCTS_CSV, bump_data_version, data_version, load_legacy_name_index,
+                     normalize_catalog, typed_inventory_frame)
+import perf
 
 
 def _inventory_status_from_stock_left(stock_left: int) -> str:
@@ -35,7 +50,7 @@ def load_master():
     """Load Supabase products as the master product list."""
     try:
         supabase = get_authed_supabase()
-        res = supabase.table("products").select("name,category,status,sku,price").execute()
+        res = supabase_execute(supabase.table("products").select("name,category,status,sku,price"))
         rows = getattr(res, "data", None) or []
     except Exception as e:
         st.error(f"Unable to load products from Supabase: {e}")
@@ -43,7 +58,7 @@ def load_master():
 
     df = pd.DataFrame(rows)
     if df.empty:
-        df = pd.DataFrame(columns=["Category", "Product name", "Product Status", "SKU#", "Final Price"])
+        df = pd.DataFrame(columns=CATALOG_COLUMNS)
         return df
 
     df = df.rename(columns={
@@ -54,68 +69,178 @@ def load_master():
         "price": "Final Price",
     })
 
-    df["Product name"] = df["Product name"].astype(str).str.strip()
-    df["Category"] = df["Category"].astype(str).str.strip()
-    df["SKU#"] = df["SKU#"].astype(str).str.strip()
-    
-    # Normalize product names (add space before x)
-    df["Product name"] = df["Product name"].apply(
-        lambda x: re.sub(r'(\w)\s*x\s*([A-Z])', r'\1 x \2', str(x)) if pd.notna(x) else x
-    )
-    df["Product name"] = df["Product name"].apply(
-        lambda x: re.sub(r'(\w)x([A-Z])', r'\1 x \2', str(x)) if pd.notna(x) else x
-    )
-    
-    # Clean price
-    def clean_price(x):
-        if pd.isna(x) or x == "" or str(x).lower in ["nan", "none", ""]:
-            return 0.0
-        if isinstance(x, str): 
-            x = x.replace("$", "").replace(",", "").strip()
-        try:
-            return float(x or 0)
-        except:
-            return 0.0
-    
-    df["Final Price"] = df["Final Price"].apply(clean_price)
-    
-    # Remove rows with empty/invalid SKUs
-    df = df[df["SKU#"].notna() & (df["SKU#"].str.strip() != "")]
-    df = df[df["Product name"].notna() & (df["Product name"].str.strip() != "")]
-    
-    return df
+    return normalize_catalog(df, fix_separators=True)
 
-@st.cache_data(ttl=600)
-def load_inventory():
-    """Load inventory data from Supabase"""
+@st.cache_data(ttl=600, max_entries=2)
+def load_inventory(version=0):
+    """Load inventory data from Supabase; ``version`` is the "inventory" data version it is fresh for."""
     try:
         supabase = get_authed_supabase()
-        res = supabase.table("inventory").select("*").execute()
+        res = supabase_execute(supabase.table("inventory").select("*"))
         rows = getattr(res, "data", None) or []
-        return pd.DataFrame(rows)
+        return typed_inventory_frame(pd.DataFrame(rows))
     except Exception as e:
         st.error(f"Unable to load inventory from Supabase: {e}")
         return pd.DataFrame()
 
-@st.cache_data(ttl=600)
+SUMMARY_KEYS = ["Category", "Status"]
+SUMMARY_COLUMNS = ["Products", "Units Bought", "Units Left", "Stock Value"]
+INVENTORY_SNAPSHOT_TTL = 600
+
+
+def _status_series(stock_left):
+    """Vectorized ``_inventory_status_from_stock_left``."""
+    return pd.Series(
+        np.select(
+            [stock_left < 0, stock_left == 0, stock_left <= 10],
+            ["Backordered", "Out of stock", "Low stock"],
+            "In stock",
+        ),
+        index=stock_left.index,
+    )
+
+
+def _summary_contributions(inv_df):
+    """Per (category, status) totals for the given inventory rows."""
+    n = len(inv_df)
+    left = pd.to_numeric(inv_df["stock_left"], errors="coerce").fillna(0) if "stock_left" in inv_df.columns else pd.Series(0, index=inv_df.index)
+    bought = pd.to_numeric(inv_df["stock_bought"], errors="coerce").fillna(0) if "stock_bought" in inv_df.columns else pd.Series(0, index=inv_df.index)
+    price = pd.to_numeric(inv_df["price"], errors="coerce").fillna(0.0) if "price" in inv_df.columns else pd.Series(0.0, index=inv_df.index)
+    if "status" in inv_df.columns:
+        status = inv_df["status"].astype(object).where(inv_df["status"].notna(), "")
+        status = status.astype(str).str.strip().mask(lambda x: x == "", _status_series(left))
+    else:
+        status = _status_series(left)
+    category = inv_df["category"].astype(object).fillna("").astype(str).str.strip() if "category" in inv_df.columns else pd.Series("", index=inv_df.index)
+
+    work = pd.DataFrame({
+        "Category": category.replace("", "Uncategorized").to_numpy(),
+        "Status": status.to_numpy(),
+        "Products": np.ones(n, dtype="int64"),
+        "Units Bought": bought.to_numpy(dtype="int64"),
+        "Units Left": left.to_numpy(dtype="int64"),
+        "Stock Value": (left.clip(lower=0) * price).to_numpy(dtype="float64"),
+    })
+    return work.groupby(SUMMARY_KEYS, sort=True)[SUMMARY_COLUMNS].sum()
+
+
+def summarize_inventory(inv_df):
+    """Local replacement for the ``inventory_summary`` view, computed with group-bys."""
+    if inv_df is None or inv_df.empty:
+        return pd.DataFrame(columns=SUMMARY_COLUMNS, index=pd.MultiIndex.from_tuples([], names=SUMMARY_KEYS))
+    return _summary_contributions(inv_df)
+
+
+@st.cache_resource(show_spinner=False)
+def _inventory_store():
+    """Process-wide holder of the current inventory snapshot."""
+    return {"lock": threading.Lock(), "snapshot": None}
+
+
+def get_inventory_snapshot():
+    """Inventory rows and summary, shared by every session (treat as read-only).
+
+    Built from the cached inventory query and rebuilt whenever any session
+    writes inventory (writes bump the "inventory" data version) or after
+    INVENTORY_SNAPSHOT_TTL, for changes made outside the app. Adjustments are
+    patched in by ``_patch_inventory_snapshot`` so neither the table nor the
+    summary has to wait on a reload.
+    """
+    store = _inventory_store()
+    with store["lock"]:
+        snap = store["snapshot"]
+        version = data_version("inventory")
+        if snap is None or snap["version"] != version or time.time() - snap["loaded_at"] > INVENTORY_SNAPSHOT_TTL:
+            if snap is not None and snap["version"] == version:
+                load_inventory.clear()  # expired: pick up writes made outside the app
+            inv_df = load_inventory(version)
+            snap = {"df": inv_df, "summary": summarize_inventory(inv_df), "version": version, "loaded_at": time.time()}
+            store["snapshot"] = snap
+        return snap
+
+
+def inventory_search_index(snap):
+    """Name/SKU search index for ``snap``, built on first use and kept with it."""
+    index = snap.get("index")
+    if index is None:
+        index = snap["index"] = SearchIndex.from_frame(snap["df"], "item_name", "sku")
+    return index
+
+
+def invalidate_inventory_snapshot():
+    """Make every session reload inventory on its next read."""
+    bump_data_version("inventory")
+
+
+def _patched_snapshot(snap, updated_rows):
+    """Copy of ``snap`` with written rows applied and its summary updated incrementally."""
+    inv_df = snap["df"]
+    updates = pd.DataFrame(updated_rows).drop_duplicates("sku", keep="last").set_index("sku")
+    keys = inv_df["sku"].astype(str)
+    hit = keys.isin(updates.index)
+    if not hit.any():
+        return dict(snap)
+
+    inv_df = inv_df.copy()
+    before = inv_df.loc[hit]
+    for col in updates.columns:
+        if col not in inv_df.columns:
+            continue
+        values = keys[hit].map(updates[col])
+        if isinstance(inv_df[col].dtype, pd.CategoricalDtype):
+            new_cats = pd.Index(values.dropna().unique()).difference(inv_df[col].cat.categories)
+            if len(new_cats):
+                inv_df[col] = inv_df[col].cat.add_categories(new_cats)
+        inv_df.loc[hit, col] = values
+    after = inv_df.loc[hit]
+
+    patched = {**snap, "df": inv_df}
+    if before["item_name"].tolist() != after["item_name"].tolist():
+        patched.pop("index", None)  # renamed rows; positions are unchanged but names are not
+
+    summary = snap["summary"]
+    summary = summary.add(_summary_contributions(after), fill_value=0).sub(_summary_contributions(before), fill_value=0)
+    summary = summary[summary["Products"] > 0]
+    patched["summary"] = summary.astype({c: "int64" for c in SUMMARY_COLUMNS if c != "Stock Value"})
+    return patched
+
+
+def _patch_inventory_snapshot(updated_rows):
+    """Publish the shared snapshot with rows this session just wrote applied.
+
+    Other sessions see the patched snapshot on their next rerun; a snapshot
+    that was already out of date is dropped and reloaded instead.
+    """
+    store = _inventory_store()
+    with store["lock"]:
+        snap = store["snapshot"]
+        current = snap is not None and snap["version"] == data_version("inventory")
+        version = bump_data_version("inventory")
+        if not current or snap["df"].empty or "sku" not in snap["df"].columns:
+            store["snapshot"] = None
+            return
+        if updated_rows:
+            snap = _patched_snapshot(snap, updated_rows)
+        store["snapshot"] = {**snap, "version": version}
+
+
 def load_inventory_summary():
-    """Load inventory summary from Supabase view"""
-    try:
-        supabase = get_authed_supabase()
-        res = supabase.table("inventory_summary").select("*").execute()
-        rows = getattr(res, "data", None) or []
-        return pd.DataFrame(rows)
-    except Exception as e:
-        st.error(f"Unable to load inventory summary from Supabase: {e}")
-        return pd.DataFrame()
+    """Inventory summary for display, computed locally from the shared snapshot."""
+    return get_inventory_snapshot()["summary"].reset_index()
+
+
+@st.cache_data(show_spinner=False)
+def _read_phased_products(path, mtime):
+    df = pd.read_csv(path)
+    df["Product name"] = df["Product name"].str.strip()
+    return df
 
 def load_phased_products():
     """Load PPwP.csv (Phased Products with Prices) for legacy product names"""
-    if os.path.exists("PPwP.csv"):
+    if os.path.exists(LEGACY_PRODUCTS_CSV):
         try:
-            df = pd.read_csv("PPwP.csv")
-            df["Product name"] = df["Product name"].str.strip()
-            return df
+            # Keyed by mtime: re-read only when the file changes
+            return _read_phased_products(LEGACY_PRODUCTS_CSV, os.path.getmtime(LEGACY_PRODUCTS_CSV))
         except Exception as e:
             st.warning(f"Could not load PPwP.csv: {e}")
             return pd.DataFrame()
@@ -123,329 +248,904 @@ def load_phased_products():
 
 def get_legacy_product_mapping():
     """Map legacy product names to current SKUs from PPwP.csv"""
-    mapping = {}
-    df = load_phased_products()
-    if not df.empty:
-        for _, row in df.iterrows():
-            product_name = str(row["Product name"]).strip()
-            sku = str(row["SKU#"]).strip()
-            mapping[product_name] = sku
-    return mapping
+    try:
+        return dict(load_legacy_name_index())
+    except Exception as e:
+        st.warning(f"Could not load PPwP.csv: {e}")
+        return {}
+
+INVOICE_ITEM_COLUMNS = ["item", "sku", "unit_price", "quantity", "amount"]
+
+# Result key -> pattern capturing the value after its "Label:"
+_INVOICE_HEADER_PATTERNS = {
+    "invoice_number": re.compile(r"invoice number:\s*(\S+)", re.IGNORECASE),
+    "invoice_date": re.compile(r"invoice date:\s*(\d{1,2}/\d{1,2}/\d{2,4}|[A-Za-z]+ \d{1,2}, \d{4}|\S+)", re.IGNORECASE),
+    "discount_date": re.compile(r"discount date:\s*(\d{1,2}/\d{1,2}/\d{2,4}|[A-Za-z]+ \d{1,2}, \d{4}|\S+)", re.IGNORECASE),
+    "due_date": re.compile(r"due date:\s*(\d{1,2}/\d{1,2}/\d{2,4}|[A-Za-z]+ \d{1,2}, \d{4}|\S+)", re.IGNORECASE),
+    "invoice_total": re.compile(r"invoice total:\s*(\$?[\d,]+(?:\.\d{2})?)", re.IGNORECASE),
+    "order_placed_by": re.compile(r"order placed by:\s*(.+)$", re.IGNORECASE),
+    "po_number": re.compile(r"your po number/reference:\s*(.+)$", re.IGNORECASE),
+}
+
+# "Lavender Candle  TH-001  $4.50  12  $54.00" (text fallback when no ruled table is found)
+_INVOICE_ITEM_LINE_RE = re.compile(
+    r"^(?P<item>.+?)\s+(?P<sku>[A-Za-z0-9][\w.\-]*)\s+\$?(?P<unit_price>[\d,]*\.\d{2})"
+    r"\s+(?P<quantity>\d+)\s+\$?(?P<amount>[\d,]*\.\d{2})$"
+)
+# A whole footer label ("Subtotal:", "Shipping cost (Ground Shipping)"), never an item name that starts like one
+_INVOICE_FOOTER_RE = re.compile(r"^(?:shipping cost(?:\s*\(.*\))?|subtotal|tax|grand total)\s*:?$", re.IGNORECASE)
+
+
+def _parse_money(val) -> float:
+    try:
+        return float(str(val).replace("$", "").replace(",", "").strip() or 0)
+    except ValueError:
+        return 0.0
+
+
+def _invoice_item(item, sku, unit_price, quantity, amount, page_number):
+    sku = str(sku or "").strip()
+    qty = _safe_int(quantity, -1)
+    if not sku or qty < 0:
+        return None
+    return {
+        "item": " ".join(str(item or "").split()),
+        "sku": sku,
+        "unit_price": _parse_money(unit_price),
+        "quantity": qty,
+        "amount": _parse_money(amount),
+        "page": page_number,
+    }
+
+
+def _is_invoice_footer(cells, columns, sku):
+    """A totals row: a footer label outside the item/SKU columns, or anywhere on a row without a SKU."""
+    item_cols = {columns["item"], columns["sku"]}
+    return any(_INVOICE_FOOTER_RE.match(c) and (i not in item_cols or not sku) for i, c in enumerate(cells) if c)
+
+
+def _invoice_items_from_tables(tables, page_number):
+    """Item rows from pdfplumber tables that carry the SKU#/Quantity header."""
+    items = []
+    for table in tables or []:
+        columns = None
+        for raw in table:
+            cells = [str(c or "").strip() for c in raw]
+            lowered = [c.lower() for c in cells]
+            if columns is None:
+                if "sku#" in lowered and "quantity" in lowered:
+                    columns = {
+                        "item": lowered.index("item") if "item" in lowered else 0,
+                        "sku": lowered.index("sku#"),
+                        "unit_price": lowered.index("unit price") if "unit price" in lowered else None,
+                        "quantity": lowered.index("quantity"),
+                        "amount": lowered.index("amount") if "amount" in lowered else None,
+                    }
+                continue
+            get = lambda key: cells[columns[key]] if columns[key] is not None and columns[key] < len(cells) else ""
+            if _is_invoice_footer(cells, columns, get("sku")):
+                break
+            row = _invoice_item(get("item"), get("sku"), get("unit_price"), get("quantity"), get("amount"), page_number)
+            if row:
+                items.append(row)
+    return items
+
+
+def _invoice_items_from_lines(lines, page_number):
+    items = []
+    for line in lines:
+        m = _INVOICE_ITEM_LINE_RE.match(line)
+        if m and not _INVOICE_FOOTER_RE.match(m.group("item").strip()):
+            row = _invoice_item(page_number=page_number, **m.groupdict())
+            if row:
+                items.append(row)
+    return items
+
+
+def _parse_invoice_header(lines):
+    header = {}
+    for line in lines:
+        for key, pattern in _INVOICE_HEADER_PATTERNS.items():
+            if key in header:
+                continue
+            m = pattern.search(line)
+            if m:
+                header[key] = m.group(1).strip()
+    return header
+
+
+def parse_invoice_page(page, page_number=1):
+    """Header fields and line items from one pdfplumber page (pages are independent)."""
+    text = page.extract_text() or ""
+    lines = [l.strip() for l in text.splitlines() if l.strip()]
+    items = _invoice_items_from_tables(page.extract_tables(), page_number)
+    # The text layout is the fallback; it also wins when a table was cut short
+    line_items = _invoice_items_from_lines(lines, page_number)
+    if len(line_items) > len(items):
+        items = line_items
+    return _parse_invoice_header(lines), items
+
+
+def parse_invoice_pdf(pdf_file):
+    """Parse a VE Wholesale invoice into ``{"header": {...}, "items": [...]}``.
+
+    ``items`` are dicts with ``INVOICE_ITEM_COLUMNS`` plus the source ``page``.
+    Each page is extracted on its own and its layout cache released, so memory
+    stays flat on long invoices.
+    """
+    import pdfplumber  # only needed once an invoice is actually parsed
+
+    header = {}
+    items = []
+    with pdfplumber.open(pdf_file) as pdf:
+        for number, page in enumerate(pdf.pages, start=1):
+            page_header, page_items = parse_invoice_page(page, number)
+            for key, value in page_header.items():
+                header.setdefault(key, value)
+            items.extend(page_items)
+            if hasattr(page, "close"):
+                page.close()
+    header.setdefault("invoice_number", "Unknown")
+    return {"header": header, "items": items}
+
+
+def invoice_items_frame(parsed):
+    """Line items of a parsed invoice as a DataFrame."""
+    return pd.DataFrame(parsed.get("items", []), columns=INVOICE_ITEM_COLUMNS + ["page"])
+
 
 def pdf_to_csv_converter(pdf_file):
     """Convert PDF invoice to CSV format matching Zamzar output"""
     try:
-        text = ""
-        with pdfplumber.open(pdf_file) as pdf:
-            for page in pdf.pages:
-                page_text = page.extract_text()
-                if page_text:
-                    text += page_text + "\n"
-        
-        lines = [l.strip() for l in text.split("\n") if l.strip()]
-        
-        # Extract metadata
-        invoice_num = "Unknown"
-        invoice_date = ""
-        discount_date = ""
-        due_date = ""
-        invoice_total = ""
-        order_placed_by = ""
-        po_number = ""
-        
-        # Parse header information
-        for i, line in enumerate(lines):
-            if "Invoice number:" in line or "invoice number:" in line.lower():
-                parts = line.split(":")
-                if len(parts) > 1:
-                    invoice_num = parts[1].strip().split()[0]
-            elif "Invoice date:" in line or "invoice date:" in line.lower():
-                parts = line.split(":")
-                if len(parts) > 1:
-                    invoice_date = parts[1].strip()
-            elif "Discount date:" in line or "discount date:" in line.lower():
-                parts = line.split(":")
-                if len(parts) > 1:
-                    discount_date = parts[1].strip()
-            elif "Due date:" in line or "due date:" in line.lower():
-                parts = line.split(":")
-                if len(parts) > 1:
-                    due_date = parts[1].strip()
-            elif "Invoice total:" in line or "invoice total:" in line.lower():
-                parts = line.split(":")
-                if len(parts) > 1:
-                    invoice_total = parts[1].strip()
-            elif "Order placed by:" in line or "order placed by:" in line.lower():
-                parts = line.split(":")
-                if len(parts) > 1:
-                    order_placed_by = parts[1].strip()
-        
-        # Build CSV structure
-        csv_lines = []
-        csv_lines.append("VE Wholesale Marketplace,,,,,")
-        csv_lines.append(",,,,Invoice,")
-        csv_lines.append("Email: wholesalemarketplace@veinternational.org,,,,,")
-        csv_lines.append(f"Invoice number:,{invoice_num},To:,,,")
-        csv_lines.append(f"Invoice date:,{invoice_date},Thrive Wellness,,,")
-        csv_lines.append(f"Discount date:,{discount_date},2590 Ogden Ave,,,")
-        csv_lines.append(f"Due date:,{due_date},\"Aurora, IL 60504\",,,")
-        csv_lines.append(f"Invoice total:,{invoice_total},,,,")
-        csv_lines.append(f"Order placed by:,{order_placed_by},,,,")
-        csv_lines.append("Your PO number/Reference:,,,,,")
-        csv_lines.append("Item,,SKU#,Unit price,Quantity,Amount")
-        
-        # Parse items from PDF (this is a simplified parser)
-        csv_lines.append("Shipping cost (Ground Shipping),,,,$0.00,")
-        csv_lines.append(f",,,Subtotal:,{invoice_total},")
-        csv_lines.append(",,,Tax:,$0.00,")
-        csv_lines.append(f",,Grand total:,,{invoice_total},")
-        csv_lines.append("Please send your payment to:,,,,,")
-        csv_lines.append("VE Wholesale Marketplace,,,,,")
-        csv_lines.append("Bank account number: 630907145,,,,,")
-        csv_lines.append(f"\"Amount: {invoice_total}\",,,,,")
-        csv_lines.append(f"Payment description: INVOICE NUMBER {invoice_num},,,,,")
-        csv_lines.append("Note: Please pay this invoice in a single payment. Do not combine payment of this invoice and other invoices in one payment.,,,,,")
-        csv_lines.append("Payment Terms,,,,,")
-        csv_lines.append("\"2% 10, Net 30 from date of invoice. Past due invoices will be charged 1.5% interest per month outstanding.\",,,,,")
-        csv_lines.append("This document is used for educational purposes.,,,,,")
-        
-        return "\n".join(csv_lines)
+        parsed = parse_invoice_pdf(pdf_file)
     except Exception as e:
         st.error(f"Error converting PDF: {e}")
         return None
 
-def update_inventory_delta(sku, delta):
-    """Update inventory stock (stock_left) by a delta amount."""
+    h = parsed["header"]
+    invoice_num = h.get("invoice_number", "Unknown")
+    invoice_total = h.get("invoice_total", "")
+    rows = [
+        ["VE Wholesale Marketplace", "", "", "", "", ""],
+        ["", "", "", "", "Invoice", ""],
+        ["Email: wholesalemarketplace@veinternational.org", "", "", "", "", ""],
+        ["Invoice number:", invoice_num, "To:", "", "", ""],
+        ["Invoice date:", h.get("invoice_date", ""), "Thrive Wellness", "", "", ""],
+        ["Discount date:", h.get("discount_date", ""), "2590 Ogden Ave", "", "", ""],
+        ["Due date:", h.get("due_date", ""), "Aurora, IL 60504", "", "", ""],
+        ["Invoice total:", invoice_total, "", "", "", ""],
+        ["Order placed by:", h.get("order_placed_by", ""), "", "", "", ""],
+        ["Your PO number/Reference:", h.get("po_number", ""), "", "", "", ""],
+        ["Item", "", "SKU#", "Unit price", "Quantity", "Amount"],
+    ]
+    rows.extend(
+        [it["item"], "", it["sku"], f"${it['unit_price']:,.2f}", it["quantity"], f"${it['amount']:,.2f}"]
+        for it in parsed["items"]
+    )
+    rows.extend([
+        ["Shipping cost (Ground Shipping)", "", "", "", "$0.00", ""],
+        ["", "", "", "Subtotal:", invoice_total, ""],
+        ["", "", "", "Tax:", "$0.00", ""],
+        ["", "", "Grand total:", "", invoice_total, ""],
+        ["Please send your payment to:", "", "", "", "", ""],
+        ["VE Wholesale Marketplace", "", "", "", "", ""],
+        ["Bank account number: 630907145", "", "", "", "", ""],
+        [f"Amount: {invoice_total}", "", "", "", "", ""],
+        [f"Payment description: INVOICE NUMBER {invoice_num}", "", "", "", "", ""],
+        ["Note: Please pay this invoice in a single payment. Do not combine payment of this invoice and other invoices in one payment.", "", "", "", "", ""],
+        ["Payment Terms", "", "", "", "", ""],
+        ["2% 10, Net 30 from date of invoice. Past due invoices will be charged 1.5% interest per month outstanding.", "", "", "", "", ""],
+        ["This document is used for educational purposes.", "", "", "", "", ""],
+    ])
+    buf = io.StringIO()
+    csv.writer(buf, lineterminator="\n").writerows(rows)
+    return buf.getvalue()
+
+INVOICE_LEDGER_TABLE = "invoice_imports"
+
+
+def hash_invoice_bytes(data):
+    """SHA-256 of the raw PDF bytes; identifies an invoice regardless of file name."""
+    return hashlib.sha256(data).hexdigest()
+
+
+def _parse_invoice_bytes(data):
+    return parse_invoice_pdf(io.BytesIO(data))
+
+
+@st.cache_resource(show_spinner=False)
+def _invoice_pool():
+    """Process-wide invoice parser pool, kept warm between batches.
+
+    Workers are spawned, not forked: a fork of the multi-threaded Streamlit
+    server can inherit locks held by other threads and hang. A spawned worker
+    re-imports the app modules on start, so the pool is reused rather than
+    started per batch.
+    """
+    return ProcessPoolExecutor(max_workers=os.cpu_count() or 1, mp_context=multiprocessing.get_context("spawn"))
+
+
+def parse_invoices_parallel(blobs, max_workers=None):
+    """Parse invoice PDFs (raw bytes) in a process pool.
+
+    Results come back in input order; a failed invoice yields its exception
+    instead of a parsed dict so one bad file doesn't sink the batch.
+    ``max_workers=1`` parses in this process.
+    """
+    if not blobs:
+        return []
+    workers = max_workers or min(len(blobs), os.cpu_count() or 1)
+    if workers <= 1 or len(blobs) == 1:
+        results = []
+        for data in blobs:
+            try:
+                results.append(_parse_invoice_bytes(data))
+            except Exception as e:
+                results.append(e)
+        return results
+
+    pool = _invoice_pool()
+    futures = [pool.submit(_parse_invoice_bytes, data) for data in blobs]
+    results = []
+    for future in futures:
+        try:
+            results.append(future.result())
+        except BrokenProcessPool as e:
+            # A worker died (e.g. killed for memory); start a fresh pool next time
+            _invoice_pool.clear()
+            results.append(e)
+        except Exception as e:
+            results.append(e)
+    return results
+
+
+@st.cache_resource(show_spinner=False)
+def get_invoice_cache():
+    """Process-wide parsed-invoice cache; set INVOICE_CACHE_DIR to also keep it on disk."""
+    disk_dir = os.getenv("INVOICE_CACHE_DIR") or None
+    max_mb = _safe_int(os.getenv("INVOICE_CACHE_MAX_MB", 64), 64)
+    return InvoiceCache(disk_dir=disk_dir, max_disk_bytes=max_mb * 1024 * 1024)
+
+
+def parse_invoices_cached(blobs, keys=None):
+    """Cached batch parse: only invoices never seen before go to the process pool.
+
+    ``keys`` are the blobs' ``hash_invoice_bytes`` digests when the caller has
+    them already; otherwise they are computed here.
+    """
+    cache = get_invoice_cache()
+    if keys is None:
+        keys = [hash_invoice_bytes(b) for b in blobs]
+    results = [cache.get(k) for k in keys]
+    misses = {}
+    for i, (k, r) in enumerate(zip(keys, results)):
+        if r is None:
+            misses.setdefault(k, []).append(i)
+    if misses:
+        parsed = parse_invoices_parallel([blobs[idx[0]] for idx in misses.values()])
+        for (k, idx), result in zip(misses.items(), parsed):
+            if not isinstance(result, Exception):
+                cache.put(k, result)
+            for i in idx:
+                results[i] = result
+    return results
+
+
+def _iso_date(value):
+    """'01/15/2026' -> '2026-01-15'; unparseable values pass through unchanged."""
+    if not value:
+        return None
+    parsed = pd.to_datetime(value, errors="coerce")
+    return parsed.date().isoformat() if not pd.isna(parsed) else str(value)
+
+
+def aggregate_invoice_items(invoices):
+    """Total quantity per SKU across parsed invoices, plus the invoice fields to stamp.
+
+    ``invoices`` is a list of ``{"hash", "name", "parsed"}``. When a SKU appears
+    on several invoices, the last one in upload order supplies
+    last_updated_from_invoice / invoice_date / due_date.
+    """
+    frames = []
+    for order, inv in enumerate(invoices):
+        items = invoice_items_frame(inv["parsed"])
+        if items.empty:
+            continue
+        header = inv["parsed"].get("header", {})
+        items["order"] = order
+        items["last_updated_from_invoice"] = header.get("invoice_number", "Unknown")
+        items["invoice_date"] = _iso_date(header.get("invoice_date"))
+        items["due_date"] = _iso_date(header.get("due_date"))
+        frames.append(items)
+    if not frames:
+        return {}, {}
+
+    all_items = pd.concat(frames, ignore_index=True)
+    qty_by_sku = all_items.groupby("sku")["quantity"].sum()
+    latest = all_items.sort_values("order").groupby("sku").last()
+    meta_cols = ["last_updated_from_invoice", "invoice_date", "due_date"]
+    meta_by_sku = latest[meta_cols].astype(object).where(latest[meta_cols].notna(), None).to_dict("index")
+    return {sku: int(q) for sku, q in qty_by_sku.items() if q}, meta_by_sku
+
+
+def already_applied_invoices(hashes):
+    """Content hashes already recorded in the invoice ledger (raises if the ledger can't be read)."""
+    if not hashes:
+        return set()
+    supabase = get_authed_supabase()
+    res = supabase_execute(supabase.table(INVOICE_LEDGER_TABLE).select("content_hash").in_("content_hash", list(hashes)),
+                           snapshot=False)
+    return {r.get("content_hash") for r in (getattr(res, "data", None) or [])}
+
+
+def missing_inventory_skus(skus):
+    """The subset of ``skus`` with no inventory row (raises if inventory can't be read)."""
+    if not skus:
+        return set()
+    supabase = get_authed_supabase()
+    res = supabase_execute(supabase.table("inventory").select("sku").in_("sku", sorted(skus)), snapshot=False)
+    return set(skus) - {str(r.get("sku")) for r in (getattr(res, "data", None) or [])}
+
+
+def apply_invoice_batch(invoices):
+    """Add every invoice's quantities to stock_bought and stock_left in one bulk write.
+
+    Invoices whose content hash is already in the ledger (or repeated within
+    the batch) are skipped. Invoices listing a SKU that isn't in inventory are
+    held back whole, neither applied nor recorded, so they can be imported
+    again once the SKU exists. The ledger rows are inserted before the stock
+    update, so a concurrent second apply of the same PDF fails on the ledger's
+    unique key instead of double-counting; they are removed again if the stock
+    update fails.
+
+    Returns ``(success, message, skipped invoice names, {held invoice name: [missing SKUs]})``.
+    """
+    unique = {}
+    repeated = []
+    for inv in invoices:
+        if inv["hash"] in unique:
+            repeated.append(inv["name"])
+        unique.setdefault(inv["hash"], inv)
+    try:
+        applied = already_applied_invoices(set(unique))
+    except Exception as e:
+        return False, f"Could not read the invoice ledger ({INVOICE_LEDGER_TABLE}): {e}", [], {}
+    fresh = [inv for h, inv in unique.items() if h not in applied]
+    skipped = [inv["name"] for inv in unique.values() if inv["hash"] in applied] + repeated
+    if not fresh:
+        return True, "All invoices were already applied.", skipped, {}
+
+    invoice_skus = [{str(it["sku"]) for it in inv["parsed"].get("items", [])} for inv in fresh]
+    try:
+        missing = missing_inventory_skus(set().union(*invoice_skus))
+    except Exception as e:
+        return False, f"Could not check invoice SKUs against inventory: {e}", skipped, {}
+    held = {inv["name"]: sorted(skus & missing) for inv, skus in zip(fresh, invoice_skus) if skus & missing}
+    fresh = [inv for inv, skus in zip(fresh, invoice_skus) if not skus & missing]
+    if not fresh:
+        return True, "No invoices were applied.", skipped, held
+
+    qty_by_sku, meta_by_sku = aggregate_invoice_items(fresh)
+    ledger_rows = [{
+        "content_hash": inv["hash"],
+        "file_name": inv["name"],
+        "invoice_number": inv["parsed"].get("header", {}).get("invoice_number"),
+        "item_count": len(inv["parsed"].get("items", [])),
+        "units": int(sum(it["quantity"] for it in inv["parsed"].get("items", []))),
+    } for inv in fresh]
+
     try:
         supabase = get_authed_supabase()
-        res = supabase.table("inventory").select("stock_left").eq("sku", sku).execute()
-        rows = getattr(res, "data", None)
-        if not rows:
-            return False, "Product not found"
-        
-        current_left = rows[0].get("stock_left", 0)
-        new_left = current_left + delta
-        status = _inventory_status_from_stock_left(new_left)
-        
-        supabase.table("inventory").update({
-            "stock_left": new_left,
-            "status": status
-        }).eq("sku", sku).execute()
-        st.cache_data.clear() # Clear cache on update
-        return True, ""
+        supabase_execute(supabase.table(INVOICE_LEDGER_TABLE).insert(ledger_rows))
     except Exception as e:
-        return False, str(e)
+        return False, f"Could not record invoices in the ledger (already applied?): {e}", skipped, held
+
+    success, msg = apply_inventory_deltas(
+        {"stock_bought": qty_by_sku, "stock_left": qty_by_sku},
+        fields=meta_by_sku,
+    )
+    if not success:
+        try:
+            supabase_execute(supabase.table(INVOICE_LEDGER_TABLE).delete().in_(
+                "content_hash", [r["content_hash"] for r in ledger_rows]))
+        except Exception:
+            pass
+        return False, f"Failed to update inventory: {msg}", skipped, held
+
+    units = sum(qty_by_sku.values())
+    note = f"Applied {len(fresh)} invoice(s): {units:,} units across {len(qty_by_sku)} SKUs."
+    if msg:
+        note += f" {msg}"
+    return True, note, skipped, held
+
 
-def update_stock_bought_delta(sku, delta):
-    """Update inventory stock (stock_bought) by a delta amount."""
+ADJUST_IDLE_FLUSH_SECONDS = 3
+ADJUST_PAGE_SIZE = 20
+_ADJUST_FIELDS = ("stock_left", "stock_bought")
+
+
+def apply_inventory_deltas(deltas, fields=None):
+    """Apply many stock deltas with one SELECT and one bulk upsert.
+
+    ``deltas`` maps a field ("stock_left" / "stock_bought") to ``{sku: delta}``.
+    ``fields`` optionally sets extra columns per SKU (``{sku: {column: value}}``).
+    Status is recomputed only for SKUs whose stock_left changed.
+    """
+    fields = fields or {}
+    left = {s: d for s, d in deltas.get("stock_left", {}).items() if d}
+    bought = {s: d for s, d in deltas.get("stock_bought", {}).items() if d}
+    skus = sorted(set(left) | set(bought) | set(fields))
+    if not skus:
+        return True, ""
+    # Bulk upserts need the same keys on every row
+    extra_cols = sorted({c for values in fields.values() for c in values})
     try:
         supabase = get_authed_supabase()
-        res = supabase.table("inventory").select("stock_bought").eq("sku", sku).execute()
-        rows = getattr(res, "data", None)
-        if not rows:
-            return False, "Product not found"
-        
-        current_bought = rows[0].get("stock_bought", 0)
-        new_bought = current_bought + delta
-        
-        supabase.table("inventory").update({
-            "stock_bought": new_bought
-        }).eq("sku", sku).execute()
-        st.cache_data.clear() # Clear cache on update
+        res = supabase_execute(
+            supabase.table("inventory")
+            .select(",".join(["sku", "item_name", "stock_left", "stock_bought", "status"] + extra_cols))
+            .in_("sku", skus),
+            snapshot=False,
+        )
+        rows = {str(r.get("sku")): r for r in (getattr(res, "data", None) or [])}
+
+        payload_rows = []
+        for sku in skus:
+            row = rows.get(sku)
+            if not row:
+                continue
+            new_left = _safe_int(row.get("stock_left", 0), 0) + left.get(sku, 0)
+            new_bought = _safe_int(row.get("stock_bought", 0), 0) + bought.get(sku, 0)
+            status = _inventory_status_from_stock_left(new_left) if sku in left else row.get("status")
+            payload = {
+                "sku": sku,
+                "item_name": row.get("item_name"),
+                "stock_left": new_left,
+                "stock_bought": new_bought,
+                "status": status,
+            }
+            for col in extra_cols:
+                payload[col] = fields.get(sku, {}).get(col, row.get(col))
+            payload_rows.append(payload)
+
+        if payload_rows:
+            # Absolute values, so resending the upsert is harmless
+            supabase_execute(supabase.table("inventory").upsert(payload_rows, on_conflict="sku"), idempotent=True)
+        # Bumps the inventory data version, which is all the inventory caches key on
+        _patch_inventory_snapshot(payload_rows)
+
+        missing = [s for s in skus if s not in rows]
+        if missing:
+            return True, f"Product not found: {', '.join(missing)}"
         return True, ""
     except Exception as e:
         return False, str(e)
 
+
+def _pending_adjustments():
+    """Session-local staged deltas: ``{field: {sku: delta}}``."""
+    if "pending_adjustments" not in st.session_state:
+        st.session_state.pending_adjustments = {f: {} for f in _ADJUST_FIELDS}
+    return st.session_state.pending_adjustments
+
+
+def _pending_count():
+    return sum(len(v) for v in _pending_adjustments().values())
+
+
+def _stage_adjustment(field, sku, sign, amount_key):
+    """Button callback: record a click locally instead of writing to Supabase."""
+    amount = _safe_int(st.session_state.get(amount_key, 1), 1)
+    bucket = _pending_adjustments()[field]
+    new_delta = bucket.get(sku, 0) + sign * amount
+    if new_delta:
+        bucket[sku] = new_delta
+    else:
+        bucket.pop(sku, None)
+    st.session_state.last_adjustment_time = time.time()
+    st.session_state.adjustment_flush_status = None
+
+
+def _flush_pending_adjustments():
+    """Write every staged delta as one batch; keep them staged if the write fails."""
+    pending = _pending_adjustments()
+    count = _pending_count()
+    if not count:
+        return True
+    success, msg = apply_inventory_deltas(pending)
+    if success:
+        st.session_state.pending_adjustments = {f: {} for f in _ADJUST_FIELDS}
+        st.session_state.adjustment_flush_status = ("ok", f"Applied {count} adjustment(s).", msg)
+    else:
+        st.session_state.adjustment_flush_status = ("error", f"Failed to apply adjustments: {msg}", "")
+    return success
+
+
+def flush_staged_adjustments():
+    """Write staged Quick Adjust deltas now, for logout or leaving the page before the idle flush.
+
+    Returns ``(adjustments written, error message or None)``; on failure the
+    deltas stay staged.
+    """
+    count = _pending_count() if "pending_adjustments" in st.session_state else 0
+    if not count:
+        return 0, None
+    if _flush_pending_adjustments():
+        return count, None
+    return 0, st.session_state.adjustment_flush_status[1]
+
+
+def _flush_if_idle():
+    """Flush staged deltas once no click has arrived for ADJUST_IDLE_FLUSH_SECONDS."""
+    if not _pending_count():
+        return False
+    idle = time.time() - st.session_state.get("last_adjustment_time", 0)
+    if idle < ADJUST_IDLE_FLUSH_SECONDS:
+        return False
+    return _flush_pending_adjustments()
+
+
+@st.fragment(run_every=ADJUST_IDLE_FLUSH_SECONDS)
+def _idle_flush_ticker():
+    """Ticks on its own so staged deltas get written once clicks stop.
+
+    Only rendered while something is staged; the full rerun after a flush (or
+    once everything was discarded) drops it, which stops the timer.
+    """
+    if _flush_if_idle() or not _pending_count():
+        st.rerun()
+
+
+def _render_pending_status(key_suffix):
+    """Pending/flushed indicator with explicit Apply / Discard."""
+    count = _pending_count()
+    if count:
+        c1, c2, c3 = st.columns([4, 1, 1])
+        c1.info(f"⏳ {count} pending adjustment(s) — auto-applies after {ADJUST_IDLE_FLUSH_SECONDS}s without clicks.")
+        if c2.button("✅ Apply", key=f"apply_pending_{key_suffix}", type="primary"):
+            _flush_pending_adjustments()
+            st.rerun()
+        c3.button("↩️ Discard", key=f"discard_pending_{key_suffix}", on_click=_discard_pending_adjustments)
+        return
+
+    status = st.session_state.get("adjustment_flush_status")
+    if status:
+        kind, text, note = status
+        if kind == "ok":
+            st.success(f"✅ {text}")
+            if note:
+                st.warning(note)
+        else:
+            st.error(text)
+
+
+def _discard_pending_adjustments():
+    st.session_state.pending_adjustments = {f: {} for f in _ADJUST_FIELDS}
+
+
+def _set_adjust_page(page_key, page):
+    st.session_state[page_key] = page
+
+
+@st.fragment
+@perf.timed_function("fragment: quick adjust")
+def _render_quick_adjust(field, title, caption, column_label, key_suffix, search_key):
+    """Quick Adjust list for one stock field; clicks are staged, not written.
+
+    Runs as a fragment: typing in the search box, paging and ➖/➕ clicks rerun
+    only this section instead of the whole app. It reads the shared snapshot
+    itself, so those reruns see writes made since the last full run.
+    """
+    # The first staged click happens in this fragment; the idle-flush ticker is
+    # only started by a full run, so trigger one
+    if _pending_count() and not st.session_state.get("adjust_ticker_running"):
+        st.rerun()
+
+    st.subheader(title)
+    st.caption(caption)
+    _render_pending_status(key_suffix)
+
+    search_query = st.text_input("🔍 Search Product (Name or SKU)", "", key=search_key)
+
+    snap = get_inventory_snapshot()
+    inv_df = snap["df"]
+    if inv_df.empty:
+        st.info("No inventory to adjust.")
+        return
+
+    # Index is built once per inventory snapshot and shared by both tabs and all sessions
+    index = inventory_search_index(snap)
+    matches = index.search(search_query)
+    if not matches:
+        st.info("No matching products.")
+        return
+
+    # Only one page of rows is rendered, so the widget count per rerun is fixed
+    page_count = max(1, -(-len(matches) // ADJUST_PAGE_SIZE))
+    page_key = f"adjust_page_{key_suffix}"
+    if st.session_state.get(f"{page_key}_query") != search_query:
+        st.session_state[page_key] = 0
+        st.session_state[f"{page_key}_query"] = search_query
+    page = min(max(st.session_state.get(page_key, 0), 0), page_count - 1)
+    st.session_state[page_key] = page
+
+    start = page * ADJUST_PAGE_SIZE
+    df_display = index.rows(inv_df, matches[start:start + ADJUST_PAGE_SIZE])
+
+    pending = _pending_adjustments()[field]
+
+    st.markdown("---")
+    h1, h2, h3 = st.columns([3, 1, 2])
+    h1.markdown("**Product**")
+    h2.markdown(f"**{column_label}**")
+    h3.markdown(f"**Adjust {column_label}**")
+
+    for idx, row in df_display.iterrows():
+        sku = str(row.get("sku", ""))
+        name = row.get("item_name", "Unknown")
+        stock = _safe_int(row.get(field, 0), 0)
+        delta = pending.get(sku, 0)
+
+        with st.container():
+            c1, c2, c3 = st.columns([3, 1, 2])
+            c1.write(f"**{name}**\n`{sku}`")
+            if delta:
+                c2.write(f"**{stock + delta}**  \n:orange[{stock} {delta:+d} pending]")
+            else:
+                c2.write(f"**{stock}**")
+            with c3:
+                adj_c1, adj_c2, adj_c3 = st.columns([2, 1, 1])
+                amount_key = f"amt_{key_suffix}_{sku}"
+                adj_c1.number_input("Amount", min_value=1, step=1, value=1, key=amount_key, label_visibility="collapsed")
+                adj_c2.button("➖", key=f"dec_{key_suffix}_{sku}", on_click=_stage_adjustment, args=(field, sku, -1, amount_key))
+                adj_c3.button("➕", key=f"inc_{key_suffix}_{sku}", on_click=_stage_adjustment, args=(field, sku, 1, amount_key))
+            st.markdown("---")
+
+    n1, n2, n3 = st.columns([1, 2, 1])
+    n1.button("◀ Prev", key=f"prev_{key_suffix}", disabled=page == 0,
+              on_click=_set_adjust_page, args=(page_key, page - 1))
+    n2.markdown(
+        f"<div style='text-align:center'>Page {page + 1} of {page_count} · "
+        f"{start + 1}–{start + len(df_display)} of {len(matches)} products</div>",
+        unsafe_allow_html=True,
+    )
+    n3.button("Next ▶", key=f"next_{key_suffix}", disabled=page >= page_count - 1,
+              on_click=_set_adjust_page, args=(page_key, page + 1))
+
+
+def _render_full_inventory_table(inv_df):
+    """Editable full inventory table with bulk save."""
+    st.subheader("Current Inventory Table")
+    if not inv_df.empty and "image_url" in inv_df.columns:
+        missing_images = inv_df[(inv_df["image_url"] == "N/A") | (inv_df["image_url"].isna())]
+        if not missing_images.empty:
+            st.warning(f"⚠️ {len(missing_images)} products missing images.")
+            with st.expander("View products missing images"):
+                st.dataframe(missing_images[["sku", "item_name", "image_url"]], width='stretch', hide_index=True)
+
+    if inv_df.empty:
+        st.warning("Inventory table is empty.")
+    else:
+        inv_df = inv_df.copy()
+        for col in ["stock_bought", "stock_left"]:
+            if col in inv_df.columns:
+                inv_df[col] = pd.to_numeric(inv_df[col], errors="coerce").fillna(0).astype(int)
+        # Categorical columns would limit edits to existing values
+        for col in inv_df.select_dtypes("category").columns:
+            inv_df[col] = inv_df[col].astype(object)
+
+        with st.expander("⬇️ Export inventory"):
+            fmt = st.radio("Format", available_formats(), horizontal=True, key="inventory_export_format")
+            st.download_button(
+                f"Download {fmt}",
+                # Encoded only when clicked
+                data=lambda df=inv_df, fmt=fmt: frame_to_bytes(df, fmt, sheet_title="Inventory"),
+                file_name=file_name("inventory", fmt),
+                mime=mime_type(fmt),
+                key="inventory_export",
+            )
+
+        disabled_cols = [c for c in ["id", "created_at", "updated_at", "created_by"] if c in inv_df.columns]
+        st.data_editor(
+            inv_df,
+            num_rows="dynamic",
+            width='stretch',
+            disabled=disabled_cols,
+            key="inventory_editor",
+        )
+
+        if st.button("💾 Save Bulk Changes", type="primary"):
+            payload_rows = _edited_inventory_rows(inv_df, st.session_state.get("inventory_editor", {}))
+            try:
+                if payload_rows:
+                    supabase = get_authed_supabase()
+                    # One upsert per column set, so a row never NULLs fields it did not send
+                    batches = {}
+                    for row in payload_rows:
+                        batches.setdefault(tuple(row), []).append(row)
+                    for rows in batches.values():
+                        supabase_execute(supabase.table("inventory").upsert(rows, on_conflict="sku"), idempotent=True)
+                invalidate_inventory_snapshot()
+                st.success(f"Inventory updated ({len(payload_rows)} row(s)).")
+                st.rerun()
+            except Exception as e:
+                st.error(f"Failed to save inventory: {e}")
+
+
+_INT_FIELDS = ("stock_bought", "stock_left")
+_TEXT_FIELDS = ("status", "last_updated_from_invoice", "invoice_date", "due_date")
+
+
+def _edited_inventory_rows(inv_df, editor_state):
+    """Upsert payloads for only the rows changed or added in the inventory editor.
+
+    Edited rows send their key columns plus the fields the user changed, so a
+    save never writes back values from a copy another session has since updated.
+    """
+    rows = []
+    for pos, changes in editor_state.get("edited_rows", {}).items():
+        original = inv_df.iloc[int(pos)]
+        rows.append(({**original.to_dict(), **changes}, set(changes)))
+    for added in editor_state.get("added_rows", []):
+        rows.append((added, set(_INT_FIELDS + _TEXT_FIELDS)))
+
+    payload_rows = []
+    for r, changed in rows:
+        sku = str(r.get("sku") or "").strip()
+        item_name = str(r.get("item_name") or "").strip()
+        if not sku or not item_name:
+            continue
+        payload = {"sku": sku, "item_name": item_name}
+        for field in _INT_FIELDS:
+            if field in changed:
+                payload[field] = _safe_int(r.get(field, 0), 0)
+        for field in _TEXT_FIELDS:
+            if field in changed:
+                payload[field] = str(r.get(field) or "").strip() or None
+        if ("stock_left" in changed or "status" in changed) and not payload.get("status"):
+            # Same rule as stock adjustments: a stock change without an explicit status re-derives it
+            payload["status"] = _inventory_status_from_stock_left(_safe_int(r.get("stock_left", 0), 0))
+        payload_rows.append(payload)
+    return payload_rows
+
+
+def _render_invoice_import():
+    """Upload many invoice PDFs, parse them in parallel and restock in one write."""
+    st.subheader("Invoice Import")
+    st.caption("Upload VE Wholesale invoice PDFs. Quantities are added to both 'Stock Bought' and 'Stock Left'; "
+               "an invoice can only ever be applied once.")
+
+    files = st.file_uploader("Invoice PDFs", type=["pdf"], accept_multiple_files=True, key="invoice_files")
+    if not files:
+        return
+
+    blobs = [f.getvalue() for f in files]
+    hashes = [hash_invoice_bytes(b) for b in blobs]
+    with st.spinner(f"Parsing {len(blobs)} invoice(s)..."):
+        results = parse_invoices_cached(blobs, hashes)
+
+    invoices = []
+    rows = []
+    for f, h, result in zip(files, hashes, results):
+        if isinstance(result, Exception):
+            rows.append({"File": f.name, "Invoice #": "", "Invoice date": "", "Items": 0, "Units": 0, "Status": f"❌ {result}"})
+            continue
+        header = result.get("header", {})
+        items = result.get("items", [])
+        rows.append({
+            "File": f.name,
+            "Invoice #": header.get("invoice_number", ""),
+            "Invoice date": header.get("invoice_date", ""),
+            "Items": len(items),
+            "Units": sum(it["quantity"] for it in items),
+            "Status": "Parsed" if items else "⚠️ No line items found",
+        })
+        if items:
+            invoices.append({"hash": h, "name": f.name, "parsed": result})
+    st.dataframe(pd.DataFrame(rows), width='stretch', hide_index=True)
+
+    qty_by_sku, meta_by_sku = aggregate_invoice_items(invoices)
+    if not qty_by_sku:
+        st.info("No line items to apply.")
+        return
+    preview = pd.DataFrame([
+        {"SKU": sku, "Quantity": qty, "Invoice #": meta_by_sku.get(sku, {}).get("last_updated_from_invoice")}
+        for sku, qty in sorted(qty_by_sku.items())
+    ])
+    with st.expander(f"Per-SKU totals ({len(preview)} SKUs, {int(preview['Quantity'].sum()):,} units)"):
+        st.dataframe(preview, width='stretch', hide_index=True)
+
+    if st.button("📥 Apply Invoices to Inventory", type="primary"):
+        success, msg, skipped, held = apply_invoice_batch(invoices)
+        if skipped:
+            st.warning(f"Skipped duplicate or already-applied invoice(s): {', '.join(skipped)}")
+        if held:
+            st.warning("Not applied: these invoices list SKUs missing from inventory. Add the SKUs, then "
+                       "import the invoices again.\n\n"
+                       + "\n".join(f"- {name}: {', '.join(skus)}" for name, skus in held.items()))
+        if success:
+            st.success(msg)
+        else:
+            st.error(msg)
+
+
+INVENTORY_VIEWS = [
+    "Quick Adjust (Left)",
+    "Quick Adjust (Bought)",
+    "Inventory Summary",
+    "Full Inventory Table",
+    "Invoice Import",
+]
+
+
 def show_inventory_management():
     """Show inventory management interface with Supabase inventory"""
    
     st.title("Inventory Management")
     st.caption("Track stock levels, adjust inventory, and view summaries.")
 
-    MASTER = load_master()
+    # Products and inventory are independent queries; on a cold cache fetch both
+    # at once (the snapshot is read again below, after any idle flush patched it)
+    MASTER, _ = load_concurrently(load_master, get_inventory_snapshot)
     if MASTER.empty:
         st.error("No products found in Supabase. Please add products first.")
         return
-    inv_df = load_inventory()
-    summary_df = load_inventory_summary()
-
-    # Tabs for actions
-    tab_left, tab_bought, tab_summary, tab_current = st.tabs([
-        "Quick Adjust (Left)", 
-        "Quick Adjust (Bought)",
-        "Inventory Summary", 
-        "Full Inventory Table"
-    ])
-    
-    # 1. Quick Adjust (Left) Tab
-    with tab_left:
-        st.subheader("Quick Adjust Stock Left")
-        st.caption("Increment or decrement 'Stock Left' (remaining inventory).")
-        
-        search_query = st.text_input("🔍 Search Product (Name or SKU)", "", key="search_left")
-        
-        if inv_df.empty:
-            st.info("No inventory to adjust.")
-        else:
-            df_display = inv_df.copy()
-            if search_query:
-                mask = (
-                    df_display["item_name"].astype(str).str.contains(search_query, case=False, na=False) | 
-                    df_display["sku"].astype(str).str.contains(search_query, case=False, na=False)
-                )
-                df_display = df_display[mask]
-            
-            if "item_name" in df_display.columns:
-                df_display = df_display.sort_values("item_name")
-            
-            st.markdown("---")
-            h1, h2, h3 = st.columns([3, 1, 2])
-            h1.markdown("**Product**")
-            h2.markdown("**Left**")
-            h3.markdown("**Adjust Left**")
-            
-            MAX_ITEMS = 60
-            if len(df_display) > MAX_ITEMS and not search_query:
-                st.warning(f"Showing first {MAX_ITEMS} items.")
-                df_display = df_display.head(MAX_ITEMS)
-                
-            for idx, row in df_display.iterrows():
-                sku = str(row.get("sku", ""))
-                name = row.get("item_name", "Unknown")
-                stock = int(float(str(row.get("stock_left", 0)).replace(",", "") or 0))
-                
-                with st.container():
-                    c1, c2, c3 = st.columns([3, 1, 2])
-                    c1.write(f"**{name}**\n`{sku}`")
-                    c2.write(f"**{stock}**")
-                    with c3:
-                        adj_c1, adj_c2, adj_c3 = st.columns([2, 1, 1])
-                        amount = adj_c1.number_input("Amount", min_value=1, step=1, value=1, key=f"amt_l_{sku}", label_visibility="collapsed")
-                        if adj_c2.button("➖", key=f"dec_l_{sku}"):
-                            success, msg = update_inventory_delta(sku, -amount)
-                            if success: st.rerun()
-                            else: st.error(msg)
-                        if adj_c3.button("➕", key=f"inc_l_{sku}"):
-                            success, msg = update_inventory_delta(sku, amount)
-                            if success: st.rerun()
-                            else: st.error(msg)
-                    st.markdown("---")
-
-    # 2. Quick Adjust (Bought) Tab
-    with tab_bought:
-        st.subheader("Quick Adjust Stock Bought")
-        st.caption("Increment or decrement 'Stock Bought' (total purchased inventory).")
-        
-        search_query_b = st.text_input("🔍 Search Product (Name or SKU)", "", key="search_bought")
-        
-        if inv_df.empty:
-            st.info("No inventory to adjust.")
-        else:
-            df_display = inv_df.copy()
-            if search_query_b:
-                mask = (
-                    df_display["item_name"].astype(str).str.contains(search_query_b, case=False, na=False) | 
-                    df_display["sku"].astype(str).str.contains(search_query_b, case=False, na=False)
-                )
-                df_display = df_display[mask]
-            
-            if "item_name" in df_display.columns:
-                df_display = df_display.sort_values("item_name")
-            
-            st.markdown("---")
-            h1, h2, h3 = st.columns([3, 1, 2])
-            h1.markdown("**Product**")
-            h2.markdown("**Bought**")
-            h3.markdown("**Adjust Bought**")
-            
-            MAX_ITEMS = 60
-            if len(df_display) > MAX_ITEMS and not search_query_b:
-                st.warning(f"Showing first {MAX_ITEMS} items.")
-                df_display = df_display.head(MAX_ITEMS)
-                
-            for idx, row in df_display.iterrows():
-                sku = str(row.get("sku", ""))
-                name = row.get("item_name", "Unknown")
-                stock = int(float(str(row.get("stock_bought", 0)).replace(",", "") or 0))
-                
-                with st.container():
-                    c1, c2, c3 = st.columns([3, 1, 2])
-                    c1.write(f"**{name}**\n`{sku}`")
-                    c2.write(f"**{stock}**")
-                    with c3:
-                        adj_c1, adj_c2, adj_c3 = st.columns([2, 1, 1])
-                        amount = adj_c1.number_input("Amount", min_value=1, step=1, value=1, key=f"amt_b_{sku}", label_visibility="collapsed")
-                        if adj_c2.button("➖", key=f"dec_b_{sku}"):
-                            success, msg = update_stock_bought_delta(sku, -amount)
-                            if success: st.rerun()
-                            else: st.error(msg)
-                        if adj_c3.button("➕", key=f"inc_b_{sku}"):
-                            success, msg = update_stock_bought_delta(sku, amount)
-                            if success: st.rerun()
-                            else: st.error(msg)
-                    st.markdown("---")
-
-    # 3. Inventory Summary Tab
-    with tab_summary:
+
+    # Writes staged Quick Adjust clicks after the idle window; no ticking (and
+    # no periodic reruns) while nothing is staged
+    st.session_state.adjust_ticker_running = bool(_pending_count())
+    if st.session_state.adjust_ticker_running:
+        _idle_flush_ticker()
+
+    # Only the selected view loads its data and builds its widgets
+    # (st.tabs would run all four on every rerun)
+    view = st.radio("View", INVENTORY_VIEWS, horizontal=True, key="inventory_view", label_visibility="collapsed")
+
+    # 1. Quick Adjust (Left)
+    if view == "Quick Adjust (Left)":
+        _render_quick_adjust(
+            field="stock_left",
+            title="Quick Adjust Stock Left",
+            caption="Increment or decrement 'Stock Left' (remaining inventory).",
+            column_label="Left",
+            key_suffix="l",
+            search_key="search_left",
+        )
+
+    # 2. Quick Adjust (Bought)
+    elif view == "Quick Adjust (Bought)":
+        _render_quick_adjust(
+            field="stock_bought",
+            title="Quick Adjust Stock Bought",
+            caption="Increment or decrement 'Stock Bought' (total purchased inventory).",
+            column_label="Bought",
+            key_suffix="b",
+            search_key="search_bought",
+        )
+
+    # 3. Inventory Summary
+    elif view == "Inventory Summary":
         st.subheader("Inventory Summary")
+        summary_df = load_inventory_summary()
         if not summary_df.empty:
-            st.dataframe(summary_df, width='stretch', hide_index=True)
+            m1, m2, m3, m4 = st.columns(4)
+            m1.metric("Products", f"{int(summary_df['Products'].sum()):,}")
+            m2.metric("Units Bought", f"{int(summary_df['Units Bought'].sum()):,}")
+            m3.metric("Units Left", f"{int(summary_df['Units Left'].sum()):,}")
+            m4.metric("Stock Value", f"${summary_df['Stock Value'].sum():,.2f}")
+            st.dataframe(
+                summary_df,
+                width='stretch',
+                hide_index=True,
+                column_config={"Stock Value": st.column_config.NumberColumn(format="$%.2f")},
+            )
         else:
             st.info("No summary data available.")
 
     # 4. Full Inventory Table
-    with tab_current:
-        st.subheader("Current Inventory Table")
-        if not inv_df.empty and "image_url" in inv_df.columns:
-            missing_images = inv_df[(inv_df["image_url"] == "N/A") | (inv_df["image_url"].isna())]
-            if not missing_images.empty:
-                st.warning(f"⚠️ {len(missing_images)} products missing images.")
-                with st.expander("View products missing images"):
-                    st.dataframe(missing_images[["sku", "item_name", "image_url"]], width='stretch', hide_index=True)
-        
-        if inv_df.empty:
-            st.warning("Inventory table is empty.")
-        else:
-            inv_df = inv_df.copy()
-            for col in ["stock_bought", "stock_left"]:
-                if col in inv_df.columns:
-                    inv_df[col] = pd.to_numeric(inv_df[col], errors="coerce").fillna(0).astype(int)
-
-            disabled_cols = [c for c in ["id", "created_at", "updated_at", "created_by"] if c in inv_df.columns]
-            edited_inventory = st.data_editor(
-                inv_df,
-                num_rows="dynamic",
-                width='stretch',
-                disabled=disabled_cols,
-                key="inventory_editor",
-            )
+    elif view == "Full Inventory Table":
+        _render_full_inventory_table(get_inventory_snapshot()["df"])
 
-            if st.button("💾 Save Bulk Changes", type="primary"):
-                supabase = get_authed_supabase()
-                payload_rows = []
-                for _, r in edited_inventory.iterrows():
-                    sku = str(r.get("sku", "")).strip()
-                    item_name = str(r.get("item_name", "")).strip()
-                    if not sku or not item_name:
-                        continue
-                    stock_bought = _safe_int(r.get("stock_bought", 0), 0)
-                    stock_left = _safe_int(r.get("stock_left", 0), 0)
-                    status = str(r.get("status", "")).strip() or _inventory_status_from_stock_left(stock_left)
-                    payload_rows.append({
-                        "sku": sku,
-                        "item_name": item_name,
-                        "stock_bought": stock_bought,
-                        "stock_left": stock_left,
-                        "status": status,
-                        "last_updated_from_invoice": (str(r.get("last_updated_from_invoice", "")).strip() or None),
-                        "invoice_date": (str(r.get("invoice_date", "")).strip() or None),
-                        "due_date": (str(r.get("due_date", "")).strip() or None),
-                    })
-                try:
-                    if payload_rows:
-                        supabase.table("inventory").upsert(payload_rows, on_conflict="sku").execute()
-                    st.cache_data.clear()
-                    st.success("Inventory updated.")
-                    st.rerun()
-                except Exception as e:
-                    st.error(f"Failed to save inventory: {e}")
+    # 5. Batch invoice ingestion
+    elif view == "Invoice Import":
+        _render_invoice_import()
@@ -0,0 +1,67 @@
+"""
+Server-Time Instrumentation
+---------------------------
+Set THRIVE_PERF=1 to record how long the server spends on each full script
+run and each fragment rerun. Timings are kept per session and shown in the
+sidebar, so the cost of an interaction can be compared before and after a
+change (e.g. a full rerun vs. a fragment-scoped rerun).
+"""
+
+import functools
+import os
+import time
+from contextlib import contextmanager
+
+import streamlit as st
+
+PERF_ENABLED = os.getenv("THRIVE_PERF", "").strip().lower() not in ("", "0", "false", "no")
+_MAX_SAMPLES = 100
+
+
+def record(name, elapsed_ms):
+    if not PERF_ENABLED:
+        return
+    log = st.session_state.setdefault("_perf_log", [])
+    log.append((name, elapsed_ms))
+    del log[:-_MAX_SAMPLES]
+
+
+@contextmanager
+def timed(name):
+    """Record the wall time of the enclosed block under ``name``."""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        record(name, (time.perf_counter() - start) * 1000)
+
+
+def timed_function(name):
+    """Decorator form of ``timed``; stack it under ``@st.fragment`` to time fragment reruns."""
+    def decorator(fn):
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            with timed(name):
+                return fn(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def show_perf_panel():
+    """Sidebar table of recent server timings (only when THRIVE_PERF is set)."""
+    if not PERF_ENABLED:
+        return
+    log = st.session_state.get("_perf_log", [])
+    if not log:
+        return
+    stats = {}
+    for name, ms in log:
+        s = stats.setdefault(name, [0, 0.0, 0.0])
+        s[0] += 1
+        s[1] += ms
+        s[2] = ms
+    st.markdown("### ⏱️ Server time")
+    st.table([
+        {"Run": name, "n": n, "avg ms": round(total / n, 1), "last ms": round(last, 1)}
+        for name, (n, total, last) in stats.items()
+    ])
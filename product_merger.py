@@ -1,6 +1,490 @@
 import streamlit as st
 import pandas as pd
-import io
+import numpy as np
+import hashlib
+import importlib.util
+import os
+import tempfile
+import threading
+
+from export_formats import available_formats, csv_chunks, file_name, mime_type, write_frames
+
+
+PRODUCTS_COLUMN = "Product(s) Ordered & Quantity"
+
+REQUIRED_ORDERS = ["Transaction no", "Date", "Billing name", "Billing company",
+                   "Billing city", "Billing state/province", "Customer email",
+                   "Subtotal", "Discount", "Shipping", "Tax", "Total"]
+REQUIRED_PRODUCTS = ["Transaction no", "Item name", "Quantity"]
+
+# Orders CSV column -> merged report column, in report order
+OUTPUT_COLUMNS = {
+    "Transaction no": "Transaction No.",
+    "Date": "Purchase Date",
+    "Billing name": "Customer Name",
+    "Billing company": "Company",
+    "Billing city": "City",
+    "Billing state/province": "State",
+    "Customer email": "Customer E-Mail",
+    PRODUCTS_COLUMN: PRODUCTS_COLUMN,
+    "Subtotal": "Order Subtotal",
+    "Discount": "Discount Applied",
+    "Shipping": "Shipping",
+    "Tax": "Tax",
+    "Total": "Order Total",
+}
+
+REPORT_KEY = OUTPUT_COLUMNS["Transaction no"]
+
+CHUNK_ROWS = 200_000               # rows per chunk with the C engine
+CHUNK_BYTES = 4 * 1024 * 1024      # bytes per batch with the pyarrow engine
+SPOOL_MAX_MEMORY = 32 * 1024 * 1024
+PREVIEW_ROWS = 1000
+MAX_UPLOAD_DIGESTS = 16            # per-session memo of upload hashes, oldest dropped first
+
+
+def csv_engine():
+    """``MERGER_CSV_ENGINE`` if set, else pyarrow when installed, else pandas' C parser."""
+    engine = os.getenv("MERGER_CSV_ENGINE", "").strip().lower()
+    if engine in ("pyarrow", "c"):
+        return engine
+    return "pyarrow" if importlib.util.find_spec("pyarrow") else "c"
+
+
+def format_quantities(qty):
+    """Column-wise ``int(float(q))``; values that aren't numbers are kept as text."""
+    qty = qty.fillna(1)
+    num = pd.to_numeric(qty, errors="coerce")
+    ok = num.notna() & np.isfinite(num)
+    # Few distinct quantities: format each once and broadcast by code
+    codes, uniques = pd.factorize(num.where(ok, 0).astype("int64"))
+    text = pd.Series(np.asarray(uniques.astype(str), dtype=object)[codes], index=qty.index)
+    if not ok.all():
+        text[~ok] = qty[~ok].astype(str)
+    return text
+
+
+def _product_parts(products_df):
+    """``"Item x2, "`` pieces summed per transaction (trailing separator kept)."""
+    transaction = products_df["Transaction no"].astype(str).str.strip()
+    labels = products_df["Item name"].astype(str).str.strip() + " x" + format_quantities(products_df["Quantity"])
+    # Same result as .agg(", ".join), but groupby-sum concatenates in the
+    # grouped kernel instead of calling join once per transaction (~5x faster)
+    return (labels + ", ").groupby(transaction.to_numpy(), sort=False).sum()
+
+
+def _line_item_parts(products_df):
+    """(transaction, item name, qty) with quantities summed, for structured carts."""
+    items = pd.DataFrame({
+        "Transaction no": products_df["Transaction no"].astype(str).str.strip(),
+        "Item name": products_df["Item name"].astype(str).str.strip(),
+        # Same rule as the product string: missing (or unreadable) quantities count as 1
+        "qty": pd.to_numeric(products_df["Quantity"], errors="coerce").fillna(1).astype("int64"),
+    })
+    return items.groupby(["Transaction no", "Item name"], sort=False, as_index=False)["qty"].sum()
+
+
+def combine_line_items(parts):
+    """Line-item pieces from ``aggregate_products_chunked`` as one frame."""
+    if not parts:
+        return pd.DataFrame({"Transaction no": pd.Series(dtype=str), "Item name": pd.Series(dtype=str),
+                             "qty": pd.Series(dtype="int64")})
+    if len(parts) == 1:
+        return parts[0]
+    return pd.concat(parts, ignore_index=True).groupby(
+        ["Transaction no", "Item name"], sort=False, as_index=False)["qty"].sum()
+
+
+def _finish_products(parts):
+    grouped = parts.str[:-2]
+    return grouped.rename_axis("Transaction no").rename(PRODUCTS_COLUMN)
+
+
+def aggregate_products(products_df):
+    """One "Item x2, Other x1" string per transaction, without per-row Python.
+
+    Returns a Series indexed by transaction number.
+    """
+    if products_df.empty:
+        return pd.Series(dtype=object, name=PRODUCTS_COLUMN).rename_axis("Transaction no")
+    return _finish_products(_product_parts(products_df))
+
+
+def build_merged_output(orders_df, products_by_transaction):
+    """Merged report frame, built by rename + projection."""
+    merged = orders_df.assign(**{PRODUCTS_COLUMN: orders_df["Transaction no"].map(products_by_transaction)})
+    output = merged.rename(columns=OUTPUT_COLUMNS)[list(OUTPUT_COLUMNS.values())]
+    output.insert(0, "Web or Booth", "N/A")
+    output = output.assign(**{"Shipping Status": "", "Notes": ""})
+    return output
+
+
+def read_csv_columns(file):
+    """Header of an uploaded CSV as ``{stripped name: raw name}``; rewinds the file."""
+    file.seek(0)
+    header = pd.read_csv(file, nrows=0).columns
+    file.seek(0)
+    return {str(c).strip(): c for c in header}
+
+
+def iter_csv_chunks(file, columns, engine=None):
+    """Yield frames holding only ``columns`` (stripped names), all read as text.
+
+    ``columns`` maps stripped names to the raw header names from
+    ``read_csv_columns``. The pyarrow engine streams record batches; the C
+    engine reads ``CHUNK_ROWS`` rows at a time.
+    """
+    raw = [columns[c] for c in columns]
+    rename = {r: c for c, r in columns.items()}
+    file.seek(0)
+    if (engine or csv_engine()) == "pyarrow":
+        import pyarrow as pa
+        from pyarrow import csv as pa_csv
+
+        reader = pa_csv.open_csv(
+            file,
+            read_options=pa_csv.ReadOptions(block_size=CHUNK_BYTES),
+            convert_options=pa_csv.ConvertOptions(
+                include_columns=raw,
+                column_types={r: pa.string() for r in raw},
+                strings_can_be_null=True,
+            ),
+        )
+        for batch in reader:
+            yield batch.to_pandas().rename(columns=rename)
+    else:
+        for chunk in pd.read_csv(file, usecols=raw, dtype=str, chunksize=CHUNK_ROWS):
+            yield chunk.rename(columns=rename)
+
+
+def _not_in(index, transactions):
+    """Mask of ``transactions`` missing from a unique ``index`` (hash lookups)."""
+    return index.get_indexer(transactions) < 0
+
+
+def aggregate_products_chunked(products_file, columns, engine=None, exclude=None, line_items=None):
+    """``aggregate_products`` over a CSV read chunk by chunk.
+
+    Only the per-transaction strings are held, never the raw export.
+    Transactions in ``exclude`` (a unique Index) are skipped before any work.
+    When ``line_items`` is a list, per-chunk (transaction, item, qty) frames
+    are appended to it in the same pass (see ``combine_line_items``).
+    """
+    parts = []
+    for chunk in iter_csv_chunks(products_file, columns, engine):
+        if exclude is not None and len(exclude):
+            chunk = chunk[_not_in(exclude, chunk["Transaction no"].astype(str).str.strip())]
+        if not chunk.empty:
+            parts.append(_product_parts(chunk))
+            if line_items is not None:
+                line_items.append(_line_item_parts(chunk))
+    if not parts:
+        return aggregate_products(pd.DataFrame(columns=REQUIRED_PRODUCTS))
+    # Items of a transaction split across chunks are concatenated in file order
+    combined = parts[0] if len(parts) == 1 else pd.concat(parts).groupby(level=0, sort=False).sum()
+    return _finish_products(combined)
+
+
+def stream_merged_csv(orders_file, columns, products_by_transaction, out, engine=None, preview_rows=PREVIEW_ROWS,
+                      exclude=None, report_columns=None):
+    """Write the merged report for ``orders_file`` to the binary file ``out``.
+
+    Orders are read chunk by chunk; Shopify repeats an order's row per line
+    item, so only the first row of each transaction is kept across chunks.
+    With ``exclude`` (a unique Index of transaction numbers already reported)
+    those orders are skipped and rows are appended without a header, laid out
+    as ``report_columns``.
+    Returns ``(rows written, preview frame of the first preview_rows rows)``.
+    """
+    appending = exclude is not None
+    seen = set()
+    rows = 0
+    preview = []
+    for chunk in iter_csv_chunks(orders_file, columns, engine):
+        chunk["Transaction no"] = chunk["Transaction no"].astype(str).str.strip()
+        if appending and len(exclude):
+            chunk = chunk[_not_in(exclude, chunk["Transaction no"])]
+        chunk = chunk.drop_duplicates(subset="Transaction no")
+        fresh = np.fromiter((t not in seen for t in chunk["Transaction no"]), dtype=bool, count=len(chunk))
+        chunk = chunk[fresh]
+        if chunk.empty:
+            continue
+        seen.update(chunk["Transaction no"])
+
+        output = build_merged_output(chunk, products_by_transaction)
+        if report_columns is not None and list(output.columns) != report_columns:
+            output = output.reindex(columns=report_columns, fill_value="")
+        out.write(output.to_csv(index=False, header=rows == 0 and not appending).encode("utf-8"))
+        if rows < preview_rows:
+            preview.append(output.head(preview_rows - rows))
+        rows += len(output)
+    if rows == 0 and not appending:
+        out.write(build_merged_output(pd.DataFrame(columns=REQUIRED_ORDERS), products_by_transaction)
+                  .to_csv(index=False).encode("utf-8"))
+    preview = pd.concat(preview, ignore_index=True) if preview else pd.DataFrame()
+    return rows, preview
+
+
+def read_report_index(report_file, engine=None):
+    """Transaction numbers already in a merged report, and its header.
+
+    Returns ``(unique Index of transaction numbers, [stripped column names])``;
+    the Index's hash table makes each later membership check O(1).
+    """
+    columns = read_csv_columns(report_file)
+    if REPORT_KEY not in columns:
+        raise MissingColumnsError(f"Previous report is missing the {REPORT_KEY} column")
+    seen = [chunk[REPORT_KEY].astype(str).str.strip()
+            for chunk in iter_csv_chunks(report_file, {REPORT_KEY: columns[REPORT_KEY]}, engine)]
+    transactions = pd.concat(seen, ignore_index=True) if seen else pd.Series(dtype=str)
+    return pd.Index(transactions.unique()), list(columns)
+
+
+def _copy_report(report_file, out):
+    """Copy a previous report byte for byte, so hand edits survive untouched."""
+    report_file.seek(0)
+    last = b"\n"
+    for block in iter(lambda: report_file.read(1 << 20), b""):
+        out.write(block)
+        last = block[-1:]
+    if last not in (b"\n", b"\r"):
+        out.write(b"\n")
+    report_file.seek(0)
+
+
+# Report columns stored as numbers in Parquet/Excel exports
+NUMERIC_REPORT_COLUMNS = ["Order Subtotal", "Discount Applied", "Shipping", "Tax", "Order Total"]
+
+
+def _export_reader(result, fmt):
+    """Deferred download for a cached merge: the CSV spool as-is, or encoded on first click.
+
+    Downloads run on their own threads, so spool access is serialized.
+    """
+    def read():
+        with result["lock"]:
+            if fmt == "CSV":
+                source = result["spool"]
+            else:
+                source = result["exports"].get(fmt)
+                if source is None:
+                    source = tempfile.SpooledTemporaryFile(max_size=SPOOL_MAX_MEMORY, mode="w+b")
+                    write_frames(csv_chunks(result["spool"], NUMERIC_REPORT_COLUMNS), source, fmt,
+                                 sheet_title="Merged Orders")
+                    result["exports"][fmt] = source
+            source.seek(0)
+            return source.read()
+    return read
+
+
+def carts_by_transaction(line_items, catalog):
+    """Structured carts from merged line items, SKUs resolved against ``catalog``.
+
+    Returns ``({transaction: {sku: qty}}, Series of unmatched item name -> units)``.
+    """
+    skus = catalog.resolve_skus(line_items["Item name"])
+    known = skus.notna()
+    unmatched = (line_items.loc[~known].groupby("Item name")["qty"].sum()
+                 .sort_values(ascending=False))
+    resolved = (line_items.loc[known].assign(sku=skus[known])
+                .groupby(["Transaction no", "sku"], sort=False)["qty"].sum())
+    carts = {}
+    for (transaction, sku), qty in resolved.items():
+        carts.setdefault(transaction, {})[sku] = int(qty)
+    return carts, unmatched
+
+
+def _parse_total(value):
+    try:
+        return float(str(value).replace("$", "").replace(",", "").strip() or 0)
+    except ValueError:
+        return 0.0
+
+
+def queue_merged_orders(result, catalog, subtract_inventory=True):
+    """Push a cached merge straight into the email queue (``st.session_state.orders``).
+
+    Carts come from the structured line items, not the product strings. Orders
+    without an email or a resolvable cart, and order numbers already queued,
+    are skipped. Orders carried over from a previous report were handled when
+    that report was made, so they are passed over without being counted.
+    Returns ``(added, skipped, unmatched item names)``.
+    """
+    from email_sender import make_queue_order
+
+    carts, unmatched = carts_by_transaction(result["line_items"], catalog)
+    queue = st.session_state.setdefault("orders", [])
+    queued = {str(o.get("Order_Number")) for o in queue}
+    added = skipped = 0
+    with result["lock"]:
+        for chunk in csv_chunks(result["spool"]):
+            if result.get("previous") is not None:
+                chunk = chunk[_not_in(result["previous"], chunk["Transaction No."].str.strip())]
+            for transaction, name, email, total in chunk[
+                    ["Transaction No.", "Customer Name", "Customer E-Mail", "Order Total"]].itertuples(index=False):
+                cart = carts.get(transaction)
+                if transaction in queued:
+                    continue
+                if not cart or not email.strip():
+                    skipped += 1
+                    continue
+                first_name = name.split()[0] if name.strip() else ""
+                queue.append(make_queue_order(first_name, email.strip(), transaction, _parse_total(total),
+                                              cart, subtract_inventory))
+                queued.add(transaction)
+                added += 1
+    return added, skipped, unmatched
+
+
+def _render_email_handoff(result):
+    st.caption("Queue a fulfillment email for every merged order. SKUs are matched against the "
+               "inventory catalog directly; no CSV re-upload needed.")
+    subtract = st.checkbox("Subtract from Inventory?", value=True, key="merger_subtract_inventory")
+    if st.button("➕ Add Merged Orders to Email Queue", key="merger_queue_orders"):
+        from email_sender import load_inventory_catalog
+
+        catalog = load_inventory_catalog()
+        if catalog is None:
+            st.error("No products found in inventory.")
+            return
+        added, skipped, unmatched = queue_merged_orders(result, catalog, subtract)
+        if added:
+            st.success(f"✅ Added {added} orders to the email queue. Open Email Sender to review and send.")
+        else:
+            st.info("No new orders were added to the email queue.")
+        if skipped:
+            st.caption(f"Skipped {skipped} orders without an email address or any matched product.")
+        if not unmatched.empty:
+            st.warning(f"{len(unmatched)} item names didn't match a product: "
+                       + ", ".join(unmatched.index[:10]) + ("…" if len(unmatched) > 10 else ""))
+
+
+def _close_result(result):
+    with result["lock"]:
+        result["spool"].close()
+        for export in result["exports"].values():
+            export.close()
+
+
+def hash_upload(file):
+    """SHA-256 of an uploaded file's bytes, read in blocks; rewinds the file."""
+    digest = hashlib.sha256()
+    file.seek(0)
+    for block in iter(lambda: file.read(1 << 20), b""):
+        digest.update(block)
+    file.seek(0)
+    return digest.hexdigest()
+
+
+def upload_digest(file):
+    """Content hash of a Streamlit upload, computed once per file_id.
+
+    The memo keeps the MAX_UPLOAD_DIGESTS most recent uploads, so replacing
+    files over a long session doesn't grow it.
+    """
+    # An upload's bytes never change under the same file_id
+    digests = st.session_state.setdefault("upload_digests", {})
+    file_id = getattr(file, "file_id", None)
+    if file_id is None:
+        return hash_upload(file)
+    if file_id not in digests:
+        digests[file_id] = hash_upload(file)
+        while len(digests) > MAX_UPLOAD_DIGESTS:
+            del digests[next(iter(digests))]
+    return digests[file_id]
+
+
+class MissingColumnsError(ValueError):
+    """An export lacks columns the merged report needs."""
+
+
+def merge_orders(orders_file, products_file, out, engine=None, preview_rows=PREVIEW_ROWS, previous_report=None,
+                 line_items=None, report_index=None):
+    """Merge a Shopify Orders/Products export pair into a CSV written to ``out``.
+
+    Pure of Streamlit: takes seekable binary files (uploads or ``open(path, "rb")``)
+    and a binary output file. Raises ``MissingColumnsError`` when either export
+    lacks a required column. Returns ``(rows written, preview frame)``.
+
+    With ``previous_report`` (an earlier merged CSV, possibly with hand-edited
+    Shipping Status / Notes) the output is that report unchanged followed by
+    only the transactions it doesn't already contain; the returned row count
+    and preview cover just the new orders.
+
+    ``line_items`` is passed through to ``aggregate_products_chunked``. When
+    ``report_index`` is a list, the previous report's transaction Index is
+    appended to it.
+    """
+    # Read only the header up front; the data is streamed below
+    orders_columns = read_csv_columns(orders_file)
+    products_columns = read_csv_columns(products_file)
+
+    missing_orders = [c for c in REQUIRED_ORDERS if c not in orders_columns]
+    missing_products = [c for c in REQUIRED_PRODUCTS if c not in products_columns]
+    if missing_orders:
+        raise MissingColumnsError(f"Orders CSV is missing columns: {', '.join(missing_orders)}")
+    if missing_products:
+        raise MissingColumnsError(f"Products CSV is missing columns: {', '.join(missing_products)}")
+
+    orders_columns = {c: orders_columns[c] for c in REQUIRED_ORDERS}
+    products_columns = {c: products_columns[c] for c in REQUIRED_PRODUCTS}
+
+    exclude = report_columns = None
+    if previous_report is not None:
+        exclude, report_columns = read_report_index(previous_report, engine)
+        if report_index is not None:
+            report_index.append(exclude)
+        _copy_report(previous_report, out)
+
+    # Build Product(s) Ordered & Quantity per transaction
+    products_by_transaction = aggregate_products_chunked(products_file, products_columns, engine, exclude, line_items)
+    return stream_merged_csv(orders_file, orders_columns, products_by_transaction, out, engine, preview_rows,
+                             exclude, report_columns)
+
+
+def _merge_uploads(orders_file, products_file, previous_report=None):
+    """Merge two uploads (plus an optional previous report) into a spooled CSV.
+
+    Returns ``(result, error)``; ``result`` holds the spool, the row count, a
+    bounded preview frame, the merged line items, the previous report's
+    transactions (or None) and the Parquet/Excel encodings once downloaded.
+    """
+    # Merged CSV is written incrementally; it only spills to disk when large
+    spool = tempfile.SpooledTemporaryFile(max_size=SPOOL_MAX_MEMORY, mode="w+b")
+    line_items = []
+    report_index = []
+    try:
+        rows, preview = merge_orders(orders_file, products_file, spool, previous_report=previous_report,
+                                     line_items=line_items, report_index=report_index)
+    except MissingColumnsError as e:
+        spool.close()
+        return None, str(e)
+    except Exception as e:
+        spool.close()
+        return None, f"Error reading CSV files: {e}"
+    return {"spool": spool, "rows": rows, "preview": preview, "line_items": combine_line_items(line_items),
+            "previous": report_index[0] if report_index else None, "exports": {}, "lock": threading.Lock()}, None
+
+
+def _cached_merge(orders_file, products_file, previous_report=None):
+    """Merge ``(result, error)`` for these uploads, reused until any file's content changes.
+
+    Failures are cached too, so a bad upload isn't re-read on every rerun.
+    """
+    key = (upload_digest(orders_file), upload_digest(products_file),
+           upload_digest(previous_report) if previous_report is not None else None)
+    cached = st.session_state.get("merger_result")
+    if cached is not None and cached["key"] == key:
+        return cached["result"], cached["error"]
+
+    if cached is not None:
+        if cached["result"] is not None:
+            _close_result(cached["result"])
+        del st.session_state["merger_result"]
+    with st.spinner("Merging orders..."):
+        result, error = _merge_uploads(orders_file, products_file, previous_report)
+    st.session_state["merger_result"] = {"key": key, "result": result, "error": error}
+    return result, error
 
 
 def show_product_merger():
@@ -12,90 +496,35 @@ def show_product_merger():
         orders_file = st.file_uploader("Upload Orders CSV", type=["csv"], key="merger_orders")
     with col2:
         products_file = st.file_uploader("Upload Products CSV", type=["csv"], key="merger_products")
+    previous_report = st.file_uploader(
+        "Previous merged report (optional)", type=["csv"], key="merger_previous",
+        help="Only orders not already in this report are merged and appended; "
+             "its Shipping Status and Notes are kept as they are.",
+    )
 
     if orders_file and products_file:
-        try:
-            orders_df = pd.read_csv(orders_file)
-            products_df = pd.read_csv(products_file)
-        except Exception as e:
-            st.error(f"Error reading CSV files: {e}")
+        result, error = _cached_merge(orders_file, products_file, previous_report)
+        if error:
+            st.error(error)
             return
 
-        # Strip whitespace from column names
-        orders_df.columns = orders_df.columns.str.strip()
-        products_df.columns = products_df.columns.str.strip()
-
-        # Validate required columns
-        required_orders = {"Transaction no", "Date", "Billing name", "Billing company",
-                           "Billing city", "Billing state/province", "Customer email",
-                           "Subtotal", "Discount", "Shipping", "Tax", "Total"}
-        required_products = {"Transaction no", "Item name", "Quantity"}
-
-        missing_orders = required_orders - set(orders_df.columns)
-        missing_products = required_products - set(products_df.columns)
+        rows, preview = result["rows"], result["preview"]
+        noun = "new orders" if previous_report is not None else "orders"
+        if previous_report is not None:
+            st.success(f"Appended {rows} new orders to the previous report.")
+        else:
+            st.success(f"Merged {rows} orders successfully.")
+        if rows > len(preview):
+            st.caption(f"Showing the first {len(preview):,} of {rows:,} {noun}; the download has all of them.")
+        st.dataframe(preview, use_container_width=True)
 
-        if missing_orders:
-            st.error(f"Orders CSV is missing columns: {', '.join(missing_orders)}")
-            return
-        if missing_products:
-            st.error(f"Products CSV is missing columns: {', '.join(missing_products)}")
-            return
-
-        # Build Product(s) Ordered & Quantity per transaction
-        products_df["Transaction no"] = products_df["Transaction no"].astype(str).str.strip()
-        products_df["Item name"] = products_df["Item name"].astype(str).str.strip()
-        products_df["Quantity"] = products_df["Quantity"].fillna(1)
-
-        def aggregate_items(group):
-            parts = []
-            for _, row in group.iterrows():
-                qty = row["Quantity"]
-                try:
-                    qty = int(float(qty))
-                except (ValueError, TypeError):
-                    qty = row["Quantity"]
-                parts.append(f"{row['Item name']} x{qty}")
-            return ", ".join(parts)
-
-        products_grouped = (
-            products_df.groupby("Transaction no")
-            .apply(aggregate_items)
-            .reset_index()
-        )
-        products_grouped.columns = ["Transaction no", "Product(s) Ordered & Quantity"]
-
-        # Prepare orders — drop duplicate transaction rows (Shopify repeats per line item)
-        orders_df["Transaction no"] = orders_df["Transaction no"].astype(str).str.strip()
-        orders_df = orders_df.drop_duplicates(subset="Transaction no")
-
-        merged = orders_df.merge(products_grouped, on="Transaction no", how="left")
-
-        # Build output dataframe
-        output = pd.DataFrame()
-        output["Web or Booth"] = "N/A"
-        output["Transaction No."] = merged["Transaction no"]
-        output["Purchase Date"] = merged["Date"]
-        output["Customer Name"] = merged["Billing name"]
-        output["Company"] = merged["Billing company"]
-        output["City"] = merged["Billing city"]
-        output["State"] = merged["Billing state/province"]
-        output["Customer E-Mail"] = merged["Customer email"]
-        output["Product(s) Ordered & Quantity"] = merged["Product(s) Ordered & Quantity"]
-        output["Order Subtotal"] = merged["Subtotal"]
-        output["Discount Applied"] = merged["Discount"]
-        output["Shipping"] = merged["Shipping"]
-        output["Tax"] = merged["Tax"]
-        output["Order Total"] = merged["Total"]
-        output["Shipping Status"] = ""
-        output["Notes"] = ""
-
-        st.success(f"Merged {len(output)} orders successfully.")
-        st.dataframe(output, use_container_width=True)
-
-        csv_bytes = output.to_csv(index=False).encode("utf-8")
+        fmt = st.radio("Download format", available_formats(), horizontal=True, key="merger_format")
         st.download_button(
-            label="Download Merged CSV",
-            data=csv_bytes,
-            file_name="merged_orders.csv",
-            mime="text/csv",
+            label=f"Download Merged {fmt}",
+            data=_export_reader(result, fmt),
+            file_name=file_name("merged_orders", fmt),
+            mime=mime_type(fmt),
         )
+
+        with st.expander("📧 Send to Email Queue"):
+            _render_email_handoff(result)
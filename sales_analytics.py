@@ -0,0 +1,277 @@
+"""
+Sales Analytics
+---------------
+Best sellers, revenue by product and day-of-week trends from the same
+Shopify Orders/Products exports the Product Merger takes.
+
+Line items become one long-format table (transaction, date, sku, product,
+category, qty, price, revenue), built once per pair of uploads and cached by
+their content hashes. Every view is a vectorized group-by over that table,
+cached per date range, so a full year of orders stays interactive.
+"""
+
+import pandas as pd
+import streamlit as st
+
+from catalog import CATALOG_COLUMNS, Catalog, clean_price_column, data_version, normalize_catalog
+from export_formats import available_formats, file_name, frame_to_bytes, mime_type
+from product_merger import REQUIRED_PRODUCTS, iter_csv_chunks, read_csv_columns, upload_digest
+
+# First matching Products CSV column gives the price actually charged;
+# without one, the catalog price is used
+PRICE_COLUMNS = ["Price", "Item price", "Unit price", "Lineitem price"]
+SALES_COLUMNS = ["transaction", "date", "sku", "product", "category", "qty", "price", "revenue"]
+WEEKDAYS = ["Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday", "Sunday"]
+UNMATCHED_CATEGORY = "Unmatched"
+
+ANALYTICS_VIEWS = [
+    "Best Sellers",
+    "Revenue by Product",
+    "Day of Week",
+    "Daily Revenue",
+]
+
+# "2026-01-15 10:22:33 -0600" -> "2026-01-15 10:22:33": keep the shop's wall-clock time
+_UTC_OFFSET_PATTERN = r"^(.*\d{2}:\d{2}(?::\d{2})?)\s*(?:Z|[+-]\d{2}:?\d{2})$"
+
+
+def parse_dates(values):
+    """Column-wise date parsing; each distinct string is parsed once."""
+    codes, uniques = pd.factorize(values.fillna("").astype(str).str.strip())
+    text = pd.Series(uniques, dtype=str).str.replace(_UTC_OFFSET_PATTERN, r"\1", regex=True)
+    parsed = pd.to_datetime(text, errors="coerce", format="ISO8601")
+    failed = parsed.isna() & (text != "")
+    if failed.any():
+        parsed[failed] = pd.to_datetime(text[failed], errors="coerce", format="mixed")
+    return pd.Series(parsed.to_numpy()[codes], index=values.index)
+
+
+def order_dates(orders_file, engine=None):
+    """Transaction number -> order date (first row per transaction)."""
+    columns = read_csv_columns(orders_file)
+    missing = [c for c in ("Transaction no", "Date") if c not in columns]
+    if missing:
+        raise ValueError(f"Orders CSV is missing columns: {', '.join(missing)}")
+    parts = []
+    for chunk in iter_csv_chunks(orders_file, {c: columns[c] for c in ("Transaction no", "Date")}, engine):
+        chunk["Transaction no"] = chunk["Transaction no"].astype(str).str.strip()
+        parts.append(chunk.drop_duplicates(subset="Transaction no"))
+    if not parts:
+        return pd.Series(dtype="datetime64[ns]")
+    orders = pd.concat(parts, ignore_index=True).drop_duplicates(subset="Transaction no")
+    return pd.Series(parse_dates(orders["Date"]).to_numpy(), index=orders["Transaction no"].to_numpy())
+
+
+def line_items(products_file, engine=None):
+    """One row per Products CSV line: transaction, item name, qty and (if exported) price."""
+    columns = read_csv_columns(products_file)
+    missing = [c for c in REQUIRED_PRODUCTS if c not in columns]
+    if missing:
+        raise ValueError(f"Products CSV is missing columns: {', '.join(missing)}")
+    price_col = next((c for c in PRICE_COLUMNS if c in columns), None)
+    wanted = REQUIRED_PRODUCTS + ([price_col] if price_col else [])
+
+    parts = []
+    for chunk in iter_csv_chunks(products_file, {c: columns[c] for c in wanted}, engine):
+        parts.append(pd.DataFrame({
+            "transaction": chunk["Transaction no"].astype(str).str.strip(),
+            "item": chunk["Item name"].astype(str).str.strip(),
+            # Same rule as the merger: missing quantities count as 1
+            "qty": pd.to_numeric(chunk["Quantity"], errors="coerce").fillna(1).astype("int64"),
+            "price": clean_price_column(chunk[price_col]) if price_col else float("nan"),
+        }))
+    if not parts:
+        return pd.DataFrame({"transaction": pd.Series(dtype=str), "item": pd.Series(dtype=str),
+                             "qty": pd.Series(dtype="int64"), "price": pd.Series(dtype=float)})
+    return pd.concat(parts, ignore_index=True)
+
+
+def build_sales_table(orders_file, products_file, catalog, engine=None):
+    """Long-format sales table (``SALES_COLUMNS``) with SKUs resolved against ``catalog``.
+
+    Unmatched items keep their exported name as the product and fall under
+    the "Unmatched" category; exported prices win over catalog prices.
+    """
+    items = line_items(products_file, engine)
+    dates = order_dates(orders_file, engine)
+
+    skus = catalog.resolve_skus(items["item"])
+    by_sku = catalog.frame.drop_duplicates("SKU#").set_index("SKU#")
+    catalog_price = skus.map(by_sku["Final Price"]).astype(float)
+    price = items["price"].fillna(catalog_price).fillna(0.0)
+
+    table = pd.DataFrame({
+        "transaction": items["transaction"],
+        "date": items["transaction"].map(dates),
+        "sku": skus.fillna(""),
+        "product": skus.map(by_sku["Product name"]).fillna(items["item"]),
+        "category": skus.map(by_sku["Category"].astype(str)).fillna(UNMATCHED_CATEGORY),
+        "qty": items["qty"],
+        "price": price,
+        "revenue": items["qty"] * price,
+    })
+    for col in ("sku", "product", "category"):
+        table[col] = table[col].astype("category")
+    return table
+
+
+def sales_aggregates(table):
+    """Totals, per-product, per-category, weekday and daily aggregates of a sales table."""
+    orders = table["transaction"].nunique()
+    revenue = float(table["revenue"].sum())
+    totals = {
+        "orders": orders,
+        "units": int(table["qty"].sum()),
+        "revenue": revenue,
+        "avg_order": revenue / orders if orders else 0.0,
+    }
+
+    def per(key):
+        return table.groupby(key, observed=True).agg(
+            units=("qty", "sum"), revenue=("revenue", "sum"), orders=("transaction", "nunique"))
+
+    by_product = per("product").sort_values(["units", "revenue"], ascending=False)
+    by_product.insert(0, "sku", table.drop_duplicates("product").set_index("product")["sku"]
+                      .astype(str).reindex(by_product.index))
+    by_category = per("category").sort_values("revenue", ascending=False)
+
+    dated = table[table["date"].notna()]
+    weekday = (dated.groupby(dated["date"].dt.dayofweek).agg(
+        orders=("transaction", "nunique"), units=("qty", "sum"), revenue=("revenue", "sum"))
+        .reindex(range(7), fill_value=0))
+    weekday.index = pd.Index(WEEKDAYS, name="weekday")
+    daily = dated.groupby(dated["date"].dt.normalize()).agg(
+        orders=("transaction", "nunique"), revenue=("revenue", "sum"))
+    daily.index.name = "day"
+    return {"totals": totals, "by_product": by_product, "by_category": by_category,
+            "weekday": weekday, "daily": daily}
+
+
+@st.cache_resource(max_entries=4, show_spinner=False)
+def _cached_sales_table(key, _orders_file, _products_file, _catalog):
+    # Shared, not copied per rerun: treat the returned frame as read-only
+    return build_sales_table(_orders_file, _products_file, _catalog)
+
+
+@st.cache_data(max_entries=32, show_spinner=False)
+def _cached_aggregates(key, start, end, _table):
+    if start is None:
+        return sales_aggregates(_table)
+    in_range = _table["date"].between(pd.Timestamp(start), pd.Timestamp(end) + pd.Timedelta(days=1),
+                                      inclusive="left")
+    return sales_aggregates(_table[in_range])
+
+
+def _render_best_sellers(aggregates):
+    top_n = st.slider("Show top", 5, 100, 25, step=5, key="analytics_top_n")
+    top = aggregates["by_product"].head(top_n)
+    st.bar_chart(top["units"])
+    st.dataframe(top, width='stretch')
+
+
+def _render_revenue_by_product(aggregates):
+    by_revenue = aggregates["by_product"].sort_values("revenue", ascending=False)
+    st.bar_chart(by_revenue["revenue"].head(25))
+    st.dataframe(by_revenue, width='stretch', column_config={"revenue": st.column_config.NumberColumn(format="$%.2f")})
+    st.markdown("#### By Category")
+    st.dataframe(aggregates["by_category"], width='stretch',
+                 column_config={"revenue": st.column_config.NumberColumn(format="$%.2f")})
+
+
+def _render_day_of_week(aggregates):
+    weekday = aggregates["weekday"]
+    col1, col2 = st.columns(2)
+    with col1:
+        st.markdown("**Orders**")
+        st.bar_chart(weekday["orders"], sort=False)
+    with col2:
+        st.markdown("**Revenue**")
+        st.bar_chart(weekday["revenue"], sort=False)
+    st.dataframe(weekday, width='stretch')
+
+
+def _render_daily_revenue(aggregates):
+    daily = aggregates["daily"]
+    if daily.empty:
+        st.info("No dated orders in this range.")
+        return
+    st.line_chart(daily["revenue"])
+    st.dataframe(daily, width='stretch')
+
+
+def show_sales_analytics():
+    st.title("Sales Analytics")
+    st.markdown("Upload the **Orders CSV** and **Products CSV** from Shopify to see best sellers, "
+                "revenue by product and weekly trends.")
+
+    col1, col2 = st.columns(2)
+    with col1:
+        orders_file = st.file_uploader("Upload Orders CSV", type=["csv"], key="analytics_orders")
+    with col2:
+        products_file = st.file_uploader("Upload Products CSV", type=["csv"], key="analytics_products")
+
+    if not (orders_file and products_file):
+        return
+
+    from email_sender import load_inventory_catalog
+
+    catalog = load_inventory_catalog()
+    loaded = catalog is not None
+    if not loaded:
+        st.warning("Inventory couldn't be loaded; products are shown by their exported names.")
+        catalog = Catalog(normalize_catalog(pd.DataFrame(columns=CATALOG_COLUMNS)))
+
+    # The catalog is rebuilt only when inventory writes bump its version, so that stands in for its contents
+    key = (upload_digest(orders_file), upload_digest(products_file), data_version("inventory"), loaded)
+    try:
+        with st.spinner("Reading line items..."):
+            table = _cached_sales_table(key, orders_file, products_file, catalog)
+    except Exception as e:
+        st.error(f"Error reading CSV files: {e}")
+        return
+    if table.empty:
+        st.info("No line items found.")
+        return
+
+    start = end = None
+    dates = table["date"].dropna()
+    if not dates.empty:
+        first, last = dates.min().date(), dates.max().date()
+        picked = st.date_input("Date range", (first, last), min_value=first, max_value=last, key="analytics_range")
+        if isinstance(picked, (tuple, list)) and len(picked) == 2:
+            start, end = picked
+    aggregates = _cached_aggregates(key, start, end, table)
+
+    totals = aggregates["totals"]
+    m1, m2, m3, m4 = st.columns(4)
+    m1.metric("Orders", f"{totals['orders']:,}")
+    m2.metric("Units", f"{totals['units']:,}")
+    m3.metric("Revenue", f"${totals['revenue']:,.2f}")
+    m4.metric("Avg Order", f"${totals['avg_order']:,.2f}")
+
+    unmatched = aggregates["by_category"].index.astype(str) == UNMATCHED_CATEGORY
+    if unmatched.any():
+        st.caption(f"{int(aggregates['by_category'].loc[unmatched, 'units'].sum()):,} units didn't match an "
+                   "inventory product and are listed under their exported names.")
+
+    # Only the selected view is computed and rendered
+    view = st.radio("View", ANALYTICS_VIEWS, horizontal=True, key="analytics_view", label_visibility="collapsed")
+    if view == "Best Sellers":
+        _render_best_sellers(aggregates)
+    elif view == "Revenue by Product":
+        _render_revenue_by_product(aggregates)
+    elif view == "Day of Week":
+        _render_day_of_week(aggregates)
+    elif view == "Daily Revenue":
+        _render_daily_revenue(aggregates)
+
+    with st.expander("⬇️ Export line items"):
+        fmt = st.radio("Format", available_formats(), horizontal=True, key="analytics_export_format")
+        st.download_button(
+            f"Download {fmt}",
+            # Encoded only when clicked
+            data=lambda fmt=fmt: frame_to_bytes(table, fmt, sheet_title="Sales"),
+            file_name=file_name("sales_line_items", fmt),
+            mime=mime_type(fmt),
+            key="analytics_export",
+        )
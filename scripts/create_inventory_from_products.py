@@ -8,7 +8,7 @@ Usage:
     python create_inventory_from_products.py
 """
 
-from supabase_client import get_supabase
+from supabase_client import get_supabase, supabase_execute
 
 
 def create_inventory_from_products():
@@ -25,7 +25,7 @@ def create_inventory_from_products():
         
         # Get all products
         print("📥 Fetching products from products table...")
-        products_result = supabase.table("products").select("*").execute()
+        products_result = supabase_execute(supabase.table("products").select("*"))
         products = products_result.data
         
         if not products:
@@ -37,7 +37,7 @@ def create_inventory_from_products():
         
         # Get existing inventory SKUs
         print("📥 Checking existing inventory...")
-        inventory_result = supabase.table("inventory").select("sku").execute()
+        inventory_result = supabase_execute(supabase.table("inventory").select("sku"))
         existing_skus = {row['sku'] for row in inventory_result.data}
         
         print(f"📦 Found {len(existing_skus)} existing inventory records")
@@ -71,7 +71,7 @@ def create_inventory_from_products():
                 }
                 
                 # Use upsert to avoid conflicts
-                supabase.table("inventory").upsert(inventory_record, on_conflict="sku").execute()
+                supabase_execute(supabase.table("inventory").upsert(inventory_record, on_conflict="sku"), idempotent=True)
                 
                 image_status = "✅" if product.get('image_url') and product.get('image_url') != 'N/A' else "⚠️"
                 print(f"  {image_status} Created '{product['sku']}' - {product['name']}")
@@ -11,7 +11,7 @@ Usage:
 Note: This uses the SQL function to bypass RLS policies
 """
 
-from supabase_client import get_supabase
+from supabase_client import get_supabase, supabase_execute
 
 
 def sync_products_to_inventory():
@@ -27,7 +27,7 @@ def sync_products_to_inventory():
         print("   (Copying ALL product data including image_url, category, price, description)")
         
         # Call the SQL function that syncs products to inventory
-        result = supabase.rpc("sync_products_to_inventory_auto").execute()
+        result = supabase_execute(supabase.rpc("sync_products_to_inventory_auto"))
         
         inserted_count = result.data if result.data else 0
         
@@ -55,7 +55,7 @@ def sync_images_to_inventory():
         print("\n🖼️  Syncing images to inventory...")
         
         # List all files in the bucket
-        files = supabase.storage.from_(bucket_name).list()
+        files = supabase_execute(lambda: supabase.storage.from_(bucket_name).list(), idempotent=True)
         
         if not files:
             print("❌ No files found in bucket")
@@ -87,7 +87,7 @@ def sync_images_to_inventory():
                 public_url = supabase.storage.from_(bucket_name).get_public_url(filename)
                 
                 # Check if SKU exists in inventory
-                check_result = supabase.table("inventory").select("sku").eq("sku", sku).execute()
+                check_result = supabase_execute(supabase.table("inventory").select("sku").eq("sku", sku))
                 
                 if not check_result.data:
                     print(f"  ⚠️  SKU '{sku}' not in inventory - skipping")
@@ -95,9 +95,9 @@ def sync_images_to_inventory():
                     continue
                 
                 # Update inventory with image URL
-                update_result = supabase.table("inventory").update({
+                update_result = supabase_execute(supabase.table("inventory").update({
                     "image_url": public_url
-                }).eq("sku", sku).execute()
+                }).eq("sku", sku))
                 
                 if update_result.data:
                     print(f"  ✅ Updated '{sku}' with image URL")
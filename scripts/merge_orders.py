@@ -0,0 +1,165 @@
+"""
+Merge Shopify Exports
+---------------------
+Headless Product Merger: merges one or more Orders/Products CSV pairs into
+merged order reports, the same report the Product Merger page produces.
+Pairs run in parallel in a process pool.
+
+Pairs are given as ORDERS PRODUCTS path pairs, and/or found with --dir: every
+``*orders*.csv`` in the folder is paired with the file of the same name with
+"orders" replaced by "products" (``2026-01-orders.csv`` +
+``2026-01-products.csv``).
+
+With --previous, a single pair is merged incrementally: the earlier report is
+kept as is (hand-edited Shipping Status / Notes included) and only orders it
+doesn't contain yet are appended.
+
+Usage:
+    python scripts/merge_orders.py ORDERS.csv PRODUCTS.csv [ORDERS.csv PRODUCTS.csv ...] [-o OUT_DIR]
+    python scripts/merge_orders.py ORDERS.csv PRODUCTS.csv --previous merged_orders.csv [-o OUT_DIR]
+    python scripts/merge_orders.py --dir exports/ [--concat all_orders.csv] [--workers 4] [--engine c|pyarrow]
+"""
+
+import argparse
+import glob
+import os
+import shutil
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from product_merger import merge_orders  # noqa: E402
+
+
+def find_pairs(directory):
+    """(orders, products) path pairs in ``directory``, matched by file name."""
+    pairs = []
+    for orders_path in sorted(glob.glob(os.path.join(directory, "*orders*.csv"))):
+        name = os.path.basename(orders_path)
+        products_path = os.path.join(directory, name.replace("orders", "products"))
+        if os.path.exists(products_path):
+            pairs.append((orders_path, products_path))
+        else:
+            print(f"⚠️  No products export for {name}, skipping")
+    return pairs
+
+
+def output_path(out_dir, orders_path):
+    name = os.path.basename(orders_path).replace("orders", "merged")
+    if name == os.path.basename(orders_path):
+        name = f"merged_{name}"
+    return os.path.join(out_dir, name)
+
+
+def merge_pair(orders_path, products_path, out_path, engine=None, previous_path=None):
+    """Merge one pair into ``out_path``; returns (rows, input bytes, seconds)."""
+    start = time.perf_counter()
+    try:
+        with open(orders_path, "rb") as orders_file, open(products_path, "rb") as products_file, \
+                open(out_path, "wb") as out:
+            if previous_path:
+                with open(previous_path, "rb") as previous:
+                    rows, _ = merge_orders(orders_file, products_file, out, engine, preview_rows=0,
+                                           previous_report=previous)
+            else:
+                rows, _ = merge_orders(orders_file, products_file, out, engine, preview_rows=0)
+    except Exception:
+        if os.path.exists(out_path):
+            os.remove(out_path)  # don't leave a half-written report behind
+        raise
+    input_bytes = os.path.getsize(orders_path) + os.path.getsize(products_path)
+    return rows, input_bytes, time.perf_counter() - start
+
+
+def concatenate(paths, destination):
+    """Append merged CSVs into one file, keeping only the first header."""
+    with open(destination, "wb") as out:
+        for i, path in enumerate(paths):
+            with open(path, "rb") as f:
+                header = f.readline()
+                if i == 0:
+                    out.write(header)
+                shutil.copyfileobj(f, out)
+
+
+def run(pairs, out_dir, workers=None, engine=None, previous_path=None):
+    """Merge every pair into ``out_dir``; returns the output paths in input order."""
+    outputs = [output_path(out_dir, orders_path) for orders_path, _ in pairs]
+    if len(set(outputs)) != len(outputs):
+        outputs = [os.path.join(out_dir, f"merged_{i:03d}.csv") for i in range(len(pairs))]
+
+    total_rows = 0
+    total_bytes = 0
+    failed = 0
+    start = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = {
+            pool.submit(merge_pair, orders_path, products_path, out_path, engine, previous_path): (orders_path, out_path)
+            for (orders_path, products_path), out_path in zip(pairs, outputs)
+        }
+        for future in as_completed(futures):
+            orders_path, out_path = futures[future]
+            try:
+                rows, input_bytes, seconds = future.result()
+            except Exception as e:
+                print(f"❌ {os.path.basename(orders_path)}: {e}")
+                failed += 1
+                continue
+            total_rows += rows
+            total_bytes += input_bytes
+            noun = "new orders" if previous_path else "orders"
+            print(f"✅ {os.path.basename(orders_path)} → {out_path}: {rows:,} {noun} in {seconds:.2f} s "
+                  f"({rows / seconds if seconds else 0:,.0f} rows/s)")
+    elapsed = time.perf_counter() - start
+
+    print()
+    print("=" * 60)
+    print(f"📊 {len(pairs) - failed}/{len(pairs)} pairs, {total_rows:,} orders in {elapsed:.2f} s")
+    if elapsed:
+        print(f"⚡ {total_rows / elapsed:,.0f} rows/s, {total_bytes / elapsed / 1e6:,.1f} MB/s of input")
+    print("=" * 60)
+    return [out for out in outputs if os.path.exists(out)], failed
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Merge Shopify Orders/Products CSV exports")
+    parser.add_argument("files", nargs="*", help="ORDERS PRODUCTS path pairs")
+    parser.add_argument("--dir", help="folder of *orders*.csv / *products*.csv exports")
+    parser.add_argument("-o", "--out-dir", default=".", help="where per-pair merged CSVs are written")
+    parser.add_argument("--concat", metavar="FILE", help="write one concatenated CSV instead of one per pair")
+    parser.add_argument("--workers", type=int, default=None, help="processes (default: CPU count)")
+    parser.add_argument("--engine", choices=["c", "pyarrow"], default=None, help="CSV parser")
+    parser.add_argument("--previous", metavar="FILE", help="earlier merged report to append new orders to")
+    args = parser.parse_args()
+
+    if len(args.files) % 2:
+        parser.error("files must come in ORDERS PRODUCTS pairs")
+    pairs = list(zip(args.files[::2], args.files[1::2]))
+    if args.dir:
+        pairs += find_pairs(args.dir)
+    if not pairs:
+        parser.error("no export pairs given")
+    if args.previous and (len(pairs) != 1 or args.concat):
+        parser.error("--previous takes exactly one export pair and no --concat")
+    if args.previous and os.path.abspath(output_path(args.out_dir, pairs[0][0])) == os.path.abspath(args.previous):
+        parser.error("--previous would be overwritten; pick another --out-dir")
+
+    print(f"🔄 Merging {len(pairs)} export pair(s)...")
+    if args.concat:
+        with tempfile.TemporaryDirectory() as tmp:
+            outputs, failed = run(pairs, tmp, args.workers, args.engine)
+            concatenate(outputs, args.concat)
+        print(f"📄 Wrote {args.concat}")
+    else:
+        os.makedirs(args.out_dir, exist_ok=True)
+        outputs, failed = run(pairs, args.out_dir, args.workers, args.engine, args.previous)
+
+    if failed:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
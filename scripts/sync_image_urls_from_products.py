@@ -8,7 +8,7 @@ Usage:
     python sync_image_urls_from_products.py
 """
 
-from supabase_client import get_supabase
+from supabase_client import get_supabase, supabase_execute
 
 
 def sync_image_urls():
@@ -25,7 +25,7 @@ def sync_image_urls():
         
         # Get all products with image URLs
         print("📥 Fetching products from products table...")
-        products_result = supabase.table("products").select("sku, image_url").execute()
+        products_result = supabase_execute(supabase.table("products").select("sku, image_url"))
         products = products_result.data
         
         if not products:
@@ -37,7 +37,7 @@ def sync_image_urls():
         
         # Get all inventory records
         print("📥 Fetching inventory records...")
-        inventory_result = supabase.table("inventory").select("sku, image_url").execute()
+        inventory_result = supabase_execute(supabase.table("inventory").select("sku, image_url"))
         inventory = inventory_result.data
         
         if not inventory:
@@ -74,9 +74,9 @@ def sync_image_urls():
                 # Only update if different
                 if current_image != new_image_url:
                     try:
-                        supabase.table("inventory").update({
+                        supabase_execute(supabase.table("inventory").update({
                             "image_url": new_image_url
-                        }).eq("sku", sku).execute()
+                        }).eq("sku", sku))
                         
                         print(f"  ✅ Updated SKU '{sku}': {new_image_url[:50]}...")
                         updated_count += 1
@@ -12,7 +12,7 @@ Usage:
     python sync_storage_to_inventory.py
 """
 
-from supabase_client import get_supabase
+from supabase_client import get_supabase, supabase_execute
 
 
 def sync_storage_images_to_inventory():
@@ -29,7 +29,7 @@ def sync_storage_images_to_inventory():
         print(f"🔍 Fetching images from '{bucket_name}' bucket...")
         
         # List all files in the bucket
-        files = supabase.storage.from_(bucket_name).list()
+        files = supabase_execute(lambda: supabase.storage.from_(bucket_name).list(), idempotent=True)
         
         if not files:
             print("❌ No files found in bucket")
@@ -63,7 +63,7 @@ def sync_storage_images_to_inventory():
                 public_url = supabase.storage.from_(bucket_name).get_public_url(filename)
                 
                 # Check if SKU exists in inventory
-                check_result = supabase.table("inventory").select("sku").eq("sku", sku).execute()
+                check_result = supabase_execute(supabase.table("inventory").select("sku").eq("sku", sku))
                 
                 if not check_result.data:
                     print(f"⚠️  SKU '{sku}' not found in inventory - skipping")
@@ -71,9 +71,9 @@ def sync_storage_images_to_inventory():
                     continue
                 
                 # Update inventory with image URL
-                update_result = supabase.table("inventory").update({
+                update_result = supabase_execute(supabase.table("inventory").update({
                     "image_url": public_url
-                }).eq("sku", sku).execute()
+                }).eq("sku", sku))
                 
                 if update_result.data:
                     print(f"✅ Updated SKU '{sku}' with image URL")
@@ -0,0 +1,126 @@
+"""
+Product Search Index
+--------------------
+In-memory name/SKU search built once per catalog snapshot and shared by the
+Quick Adjust tabs and the email sender's product lookup.
+
+Every row's lowercased name and SKU are split into character trigrams
+(an inverted index: trigram -> row ids) and word tokens (kept sorted for
+prefix lookups). A query is answered from the rarest posting list and only
+those candidates are verified, so lookups stay fast on 50k+ SKU catalogs.
+"""
+
+import bisect
+import re
+
+_TOKEN_RE = re.compile(r"[a-z0-9]+")
+_NGRAM = 3
+
+
+def _ngrams(text):
+    return {text[i:i + _NGRAM] for i in range(len(text) - _NGRAM + 1)}
+
+
+class SearchIndex:
+    """Token + trigram index over (name, sku) pairs; ``search`` returns SKUs."""
+
+    def __init__(self, names, skus):
+        self.names = ["" if n is None else str(n) for n in names]
+        self.skus = ["" if s is None else str(s).strip() for s in skus]
+        self._names_lower = [n.lower() for n in self.names]
+        self._skus_lower = [s.lower() for s in self.skus]
+        self._texts = [f"{n}\x00{s}" for n, s in zip(self._names_lower, self._skus_lower)]
+
+        grams = {}
+        tokens = {}
+        for i, text in enumerate(self._texts):
+            for g in _ngrams(text):
+                grams.setdefault(g, []).append(i)
+            for tok in set(_TOKEN_RE.findall(text)):
+                tokens.setdefault(tok, []).append(i)
+        self._grams = grams
+        self._tokens = tokens
+        self._sorted_tokens = sorted(tokens)
+        self._sorted_skus = sorted((s, i) for i, s in enumerate(self._skus_lower))
+        self._by_name = sorted(range(len(self.names)), key=lambda i: (self._names_lower[i], self._skus_lower[i]))
+        self._position_by_sku = {}
+        for i, sku in enumerate(self.skus):
+            self._position_by_sku.setdefault(sku, i)
+
+    def __len__(self):
+        return len(self.names)
+
+    @classmethod
+    def from_frame(cls, df, name_col, sku_col):
+        if df is None or df.empty or name_col not in df.columns or sku_col not in df.columns:
+            return cls([], [])
+        return cls(df[name_col].tolist(), df[sku_col].tolist())
+
+    def _token_prefix_rows(self, prefix):
+        rows = set()
+        start = bisect.bisect_left(self._sorted_tokens, prefix)
+        for tok in self._sorted_tokens[start:]:
+            if not tok.startswith(prefix):
+                break
+            rows.update(self._tokens[tok])
+        return rows
+
+    def _sku_prefix_rows(self, prefix):
+        rows = set()
+        start = bisect.bisect_left(self._sorted_skus, (prefix, -1))
+        for sku, i in self._sorted_skus[start:]:
+            if not sku.startswith(prefix):
+                break
+            rows.add(i)
+        return rows
+
+    def _candidates(self, term):
+        """Rows whose name or SKU contains ``term`` (prefix-only for terms under 3 chars)."""
+        if len(term) < _NGRAM:
+            return self._token_prefix_rows(term) | self._sku_prefix_rows(term)
+        postings = []
+        for g in _ngrams(term):
+            rows = self._grams.get(g)
+            if not rows:
+                return set()
+            postings.append(rows)
+        rarest = min(postings, key=len)
+        texts = self._texts
+        return {i for i in rarest if term in texts[i]}
+
+    def _rank(self, i, query, first_term):
+        sku = self._skus_lower[i]
+        name = self._names_lower[i]
+        if sku == query:
+            return 0
+        if sku.startswith(query):
+            return 1
+        if name.startswith(query):
+            return 2
+        if any(tok.startswith(first_term) for tok in _TOKEN_RE.findall(name)):
+            return 3
+        return 4
+
+    def search(self, query, limit=None):
+        """Return matching SKUs, best first; an empty query lists everything by name."""
+        query = str(query or "").strip().lower()
+        if not query:
+            order = self._by_name
+        else:
+            terms = query.split()
+            rows = None
+            for term in sorted(terms, key=len, reverse=True):
+                found = self._candidates(term)
+                rows = found if rows is None else rows & found
+                if not rows:
+                    return []
+            first_term = terms[0]
+            order = sorted(rows, key=lambda i: (self._rank(i, query, first_term), self._names_lower[i], self._skus_lower[i]))
+        if limit is not None:
+            order = order[:limit]
+        return [self.skus[i] for i in order]
+
+    def rows(self, df, skus):
+        """Rows of ``df``, the frame this index was built from, in the order of ``skus``."""
+        positions = [self._position_by_sku[s] for s in skus if s in self._position_by_sku]
+        return df.iloc[positions]
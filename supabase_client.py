@@ -1,8 +1,18 @@
+import contextvars
 import os
-from typing import Any, Dict, Optional, Tuple
+import random
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Any, Dict, List, Optional, Tuple
 
+import httpx
+import jwt
 import streamlit as st
-from supabase import Client, create_client
+from supabase import Client, ClientOptions, create_client
+from supabase_auth.errors import AuthError, AuthRetryableError
 
 try:
     from dotenv import load_dotenv
@@ -23,6 +33,19 @@ def _clean_env_value(v: Optional[str]) -> Optional[str]:
     return v.strip() or None
 
 
+REFRESH_MARGIN = 120  # refresh the access token this many seconds before it expires
+SESSION_CLIENT_TTL = 2 * 60 * 60  # idle per-login clients are dropped after this
+MAX_SESSION_CLIENTS = 200
+
+CALL_TIMEOUT = 15.0  # seconds per request attempt
+READ_ATTEMPTS = 3
+BACKOFF_BASE = 0.25
+BACKOFF_CAP = 4.0
+BREAKER_THRESHOLD = 5  # consecutive failed calls that open the circuit
+BREAKER_COOLDOWN = 30.0  # seconds before a trial call is let through
+MAX_SNAPSHOTS = 256
+
+
 def _get_supabase_url_key() -> Tuple[str, str]:
     url = None
     key = None
@@ -42,44 +65,325 @@ def _get_supabase_url_key() -> Tuple[str, str]:
     return url, key
 
 
-def get_supabase() -> Client:
+@lru_cache(maxsize=1)
+def _get_jwt_secret() -> Optional[str]:
+    secret = None
+    try:
+        secret = st.secrets.get("SUPABASE_JWT_SECRET")
+    except Exception:
+        pass
+    return secret or _clean_env_value(os.getenv("SUPABASE_JWT_SECRET"))
+
+
+def token_claims(access_token: str, verify_exp: bool = True) -> Dict[str, Any]:
+    """Claims of a Supabase access token, decoded locally without a network call.
+
+    The signature is verified when SUPABASE_JWT_SECRET is configured; otherwise
+    the token is trusted as the one Supabase returned at sign-in (Supabase still
+    checks it on every request). Raises ``jwt.InvalidTokenError`` (e.g.
+    ``jwt.ExpiredSignatureError``) if the token doesn't check out.
+    """
+    options = {"require": ["exp", "sub"], "verify_exp": verify_exp}
+    secret = _get_jwt_secret()
+    if secret:
+        return jwt.decode(access_token, secret, algorithms=["HS256"], audience="authenticated", options=options)
+    return jwt.decode(access_token, options={**options, "verify_signature": False})
+
+
+_call_timeout: contextvars.ContextVar[Optional[float]] = contextvars.ContextVar("supabase_call_timeout", default=None)
+
+
+def _apply_call_timeout(request: httpx.Request) -> None:
+    # httpx reads per-request timeouts from the request extensions
+    timeout = _call_timeout.get()
+    if timeout is not None:
+        request.extensions["timeout"] = httpx.Timeout(timeout, connect=min(timeout, 10.0)).as_dict()
+
+
+_last_status: contextvars.ContextVar[Optional[int]] = contextvars.ContextVar("supabase_last_status", default=None)
+
+
+def _record_status(response: httpx.Response) -> None:
+    # PostgREST's APIError doesn't carry the HTTP status; supabase_execute reads it from here
+    _last_status.set(response.status_code)
+
+
+@st.cache_resource(show_spinner=False)
+def _http_client() -> httpx.Client:
+    """One keep-alive connection pool shared by every Supabase client in the process."""
+    return httpx.Client(
+        http2=True,
+        follow_redirects=True,
+        timeout=httpx.Timeout(30.0, connect=10.0),
+        limits=httpx.Limits(max_connections=50, max_keepalive_connections=20, keepalive_expiry=60),
+        event_hooks={"request": [_apply_call_timeout], "response": [_record_status]},
+    )
+
+
+def _new_client() -> Client:
+    # Tokens are refreshed explicitly in get_authed_supabase, so no background
+    # refresh timer per client
     url, key = _get_supabase_url_key()
-    return create_client(url, key)
+    options = ClientOptions(auto_refresh_token=False, persist_session=False, httpx_client=_http_client())
+    return create_client(url, key, options=options)
+
+
+class SupabaseUnavailableError(RuntimeError):
+    """Supabase is unreachable (retries exhausted or the circuit is open)."""
+
+
+# Network-level failures; 5xx answers are treated the same way (see _server_status),
+# while 4xx API errors (bad request, RLS, constraint) are not retried
+_RETRYABLE = (httpx.TransportError, AuthRetryableError)
+# The request never reached the server, so even a write is safe to resend
+_NOT_SENT = (httpx.ConnectError, httpx.ConnectTimeout, httpx.PoolTimeout)
+
+
+class _CircuitBreaker:
+    """Fails fast after repeated network or 5xx failures, letting one trial call through per cooldown."""
+
+    def __init__(self, threshold: int, cooldown: float):
+        self.threshold = threshold
+        self.cooldown = cooldown
+        self.lock = threading.Lock()
+        self.failures = 0
+        self.opened_at: Optional[float] = None
+        self.trial_running = False
+        self.served_snapshots = False
+
+    def allow(self) -> bool:
+        with self.lock:
+            if self.opened_at is None:
+                return True
+            if self.trial_running or time.time() - self.opened_at < self.cooldown:
+                return False
+            self.trial_running = True
+            return True
+
+    def record_success(self) -> bool:
+        """Returns True on the first success after snapshots were served."""
+        with self.lock:
+            recovered = self.served_snapshots
+            self.failures = 0
+            self.opened_at = None
+            self.trial_running = False
+            self.served_snapshots = False
+            return recovered
+
+    def mark_served(self) -> None:
+        with self.lock:
+            self.served_snapshots = True
+
+    def record_failure(self) -> None:
+        with self.lock:
+            self.failures += 1
+            self.trial_running = False
+            if self.opened_at is not None or self.failures >= self.threshold:
+                self.opened_at = time.time()
+
+
+_breaker = _CircuitBreaker(BREAKER_THRESHOLD, BREAKER_COOLDOWN)
+_snapshots: "OrderedDict[Tuple, Tuple[List[Any], float]]" = OrderedDict()
+_snapshots_lock = threading.Lock()
+
+
+@dataclass
+class SnapshotResponse:
+    """Last good result of a read, served while Supabase is unreachable."""
+
+    data: List[Any]
+    fetched_at: float
+    count: Optional[int] = None
+
+
+@lru_cache(maxsize=256)
+def _token_subject(authorization: str) -> str:
+    try:
+        token = authorization.split(" ", 1)[1]
+        return str(jwt.decode(token, options={"verify_signature": False}).get("sub", "anon"))
+    except Exception:
+        return "anon"
+
+
+def _snapshot_key(query: Any) -> Optional[Tuple]:
+    # Keyed by user too: the same query returns different rows under RLS
+    request = getattr(query, "request", None)
+    if request is None or request.http_method not in ("GET", "HEAD"):
+        return None
+    owner = _token_subject(request.headers.get("Authorization", ""))
+    return owner, str(request.path), str(request.params)
+
+
+def _save_snapshot(key: Tuple, data: Any) -> None:
+    with _snapshots_lock:
+        _snapshots[key] = (data, time.time())
+        _snapshots.move_to_end(key)
+        while len(_snapshots) > MAX_SNAPSHOTS:
+            _snapshots.popitem(last=False)
+
+
+def _server_status(exc: Exception) -> Optional[int]:
+    """The 5xx status behind an API error (Supabase or its gateway failed), else None.
+
+    4xx errors mean Supabase is up and rejected the request (constraint,
+    permission, bad input), so they don't count against the breaker.
+    """
+    status = getattr(exc, "status", None)  # auth and storage errors carry it
+    if status is None:
+        status = _last_status.get()
+    try:
+        status = int(status)
+    except (TypeError, ValueError):
+        return None
+    return status if status >= 500 else None
+
+
+def _record_success() -> None:
+    if _breaker.record_success():
+        # Loaders may have cached snapshot rows; reload them now the backend is back
+        st.cache_data.clear()
+
+
+def _backoff(attempt: int) -> float:
+    # "Full jitter": spreads retries from many sessions over the whole window
+    return random.uniform(0, min(BACKOFF_CAP, BACKOFF_BASE * 2 ** attempt))
+
+
+def supabase_execute(query: Any, idempotent: Optional[bool] = None, timeout: float = CALL_TIMEOUT,
+                     attempts: int = READ_ATTEMPTS, snapshot: bool = True) -> Any:
+    """Run a Supabase request through the shared retry / circuit-breaker layer.
+
+    ``query`` is a PostgREST builder (``supabase.table(...).select(...)``) or a
+    zero-argument callable (storage, auth). Reads (GET builders, or
+    ``idempotent=True``) are retried with jittered exponential backoff; writes
+    are only resent when the connection was never made. Each attempt is capped
+    at ``timeout`` seconds. A 5xx answer counts as an outage like a network
+    failure; a 4xx answer is re-raised as is.
+
+    When Supabase is unreachable, a read returns its last good result as a
+    ``SnapshotResponse`` if there is one; otherwise ``SupabaseUnavailableError``
+    is raised. Pass ``snapshot=False`` for reads that feed a write, which must
+    never act on stale rows.
+    """
+    if hasattr(query, "retry"):
+        # postgrest retries 503/520 reads on its own (1-4 s sleeps); backoff is handled here
+        query.retry(False)
+    run = query.execute if hasattr(query, "execute") else query
+    snapshot_key = _snapshot_key(query)
+    if idempotent is None:
+        idempotent = snapshot_key is not None
+    if not snapshot:
+        snapshot_key = None
+    tries = attempts if idempotent else 1
+
+    def unavailable(reason):
+        if snapshot_key is not None:
+            with _snapshots_lock:
+                snapshot = _snapshots.get(snapshot_key)
+            if snapshot:
+                _breaker.mark_served()
+                return SnapshotResponse(data=snapshot[0], fetched_at=snapshot[1])
+        raise SupabaseUnavailableError(f"Supabase is unavailable ({reason}). Please try again shortly.")
+
+    if not _breaker.allow():
+        return unavailable("too many recent failures")
+
+    token = _call_timeout.set(timeout)
+    status_token = _last_status.set(None)
+    try:
+        attempt = 0
+        while True:
+            _last_status.set(None)
+            try:
+                result = run()
+                break
+            except Exception as e:
+                status = None if isinstance(e, _RETRYABLE) else _server_status(e)
+                if status is None and not isinstance(e, _RETRYABLE):
+                    # Supabase answered and rejected the request, so it is up
+                    _record_success()
+                    raise
+                attempt += 1
+                if attempt >= tries and not (isinstance(e, _NOT_SENT) and attempt < attempts):
+                    _breaker.record_failure()
+                    return unavailable(f"HTTP {status}" if status else e.__class__.__name__)
+                time.sleep(_backoff(attempt))
+    finally:
+        _last_status.reset(status_token)
+        _call_timeout.reset(token)
+
+    _record_success()
+    if snapshot_key is not None:
+        _save_snapshot(snapshot_key, getattr(result, "data", None))
+    return result
+
+
+def degraded_since() -> Optional[float]:
+    """When the circuit opened, or None while Supabase is reachable."""
+    return _breaker.opened_at
+
+
+@st.cache_resource(show_spinner=False)
+def get_supabase() -> Client:
+    """Shared anonymous client (no user session), e.g. for the sync scripts."""
+    return _new_client()
 
 
 def supabase_sign_in(email: str, password: str) -> Dict[str, Any]:
-    import time
-    
-    # Retry logic for network timeouts
-    max_retries = 3
-    for attempt in range(max_retries):
-        try:
-            supabase = get_supabase()
-            res = supabase.auth.sign_in_with_password({"email": email, "password": password})
-
-            session = getattr(res, "session", None)
-            if not session:
-                raise RuntimeError("Supabase sign-in did not return a session.")
-
-            return {
-                "access_token": session.access_token,
-                "refresh_token": session.refresh_token,
-            }
-        except Exception as e:
-            error_msg = str(e).lower()
-            if "timeout" in error_msg or "timed out" in error_msg:
-                if attempt < max_retries - 1:
-                    time.sleep(2)  # Wait 2 seconds before retry
-                    continue
-                else:
-                    raise RuntimeError(f"Connection timeout after {max_retries} attempts. Please check your internet connection and try again.")
-            else:
-                # Not a timeout error, raise immediately
+    # Own client: signing in stores the session on it, so never the shared one
+    supabase = _new_client()
+    try:
+        # A repeated sign-in just creates another session, so it is safe to retry
+        res = supabase_execute(lambda: supabase.auth.sign_in_with_password({"email": email, "password": password}),
+                               idempotent=True)
+    except SupabaseUnavailableError:
+        raise RuntimeError("Could not reach Supabase. Please check your internet connection and try again.")
+
+    session = getattr(res, "session", None)
+    if not session:
+        raise RuntimeError("Supabase sign-in did not return a session.")
+
+    return {
+        "access_token": session.access_token,
+        "refresh_token": session.refresh_token,
+    }
+
+
+class _SessionClient:
+    """A Supabase client bound to one login, and the tokens it currently holds."""
+
+    def __init__(self):
+        self.client = _new_client()
+        self.lock = threading.Lock()
+        self.access_token = None
+        self.refresh_token = None
+        self.expires_at = 0
+
+    def _adopt(self, session) -> None:
+        self.access_token = session.access_token
+        self.refresh_token = session.refresh_token
+        self.expires_at = session.expires_at or 0
+
+    def sync(self, access_token: str, refresh_token: str) -> Tuple[str, str]:
+        """Make the client hold a live session; returns the (possibly refreshed) tokens."""
+        with self.lock:
+            try:
+                if (access_token, refresh_token) != (self.access_token, self.refresh_token):
+                    self._adopt(supabase_execute(lambda: self.client.auth.set_session(access_token, refresh_token)).session)
+                if self.expires_at - time.time() < REFRESH_MARGIN:
+                    self._adopt(supabase_execute(lambda: self.client.auth.refresh_session(self.refresh_token)).session)
+            except Exception:
+                self.access_token = self.refresh_token = None
                 raise
+            return self.access_token, self.refresh_token
 
 
-def get_authed_supabase() -> Client:
-    supabase = get_supabase()
+@st.cache_resource(ttl=SESSION_CLIENT_TTL, max_entries=MAX_SESSION_CLIENTS, show_spinner=False)
+def _session_client(user_id: str, session_id: str) -> _SessionClient:
+    return _SessionClient()
+
+
+def _session_tokens() -> Tuple[Dict[str, Any], str, str]:
     session = st.session_state.get("supabase_session")
     if not session:
         raise RuntimeError("Supabase session not found. Please log in again.")
@@ -88,16 +392,46 @@ def get_authed_supabase() -> Client:
     refresh_token = session.get("refresh_token")
     if not access_token or not refresh_token:
         raise RuntimeError("Supabase session is missing tokens. Please log in again.")
+    return session, access_token, refresh_token
+
+
+def _client_key(access_token: str) -> Tuple[str, str]:
+    # session_id is stable across token refreshes of one login; an expired
+    # token still names its client, which then refreshes it
+    try:
+        claims = token_claims(access_token, verify_exp=False)
+    except jwt.InvalidTokenError:
+        raise RuntimeError("Supabase session is invalid. Please log in again.")
+    return str(claims["sub"]), str(claims.get("session_id", ""))
+
 
-    supabase.auth.set_session(access_token, refresh_token)
-    return supabase
+def get_authed_supabase() -> Client:
+    """The logged-in user's client, created once per login and reused across reruns and threads."""
+    session, access_token, refresh_token = _session_tokens()
+    holder = _session_client(*_client_key(access_token))
+    session["access_token"], session["refresh_token"] = holder.sync(access_token, refresh_token)
+    return holder.client
+
+
+def release_authed_supabase() -> None:
+    """Drop the current login's cached client (on logout / session expiry)."""
+    session = st.session_state.get("supabase_session") or {}
+    try:
+        _session_client.clear(*_client_key(session["access_token"]))
+    except (KeyError, RuntimeError):
+        pass
 
 
 def get_current_supabase_user_id() -> Optional[str]:
+    """User id from the session's access token; only goes to the network to refresh it near or past expiry."""
     try:
-        supabase = get_authed_supabase()
-        user = supabase.auth.get_user()
-        u = getattr(user, "user", None)
-        return getattr(u, "id", None)
-    except Exception:
+        session, access_token, _ = _session_tokens()
+        # Expiry is checked here, not by the decoder, so an expired token is refreshed rather than rejected
+        claims = token_claims(access_token, verify_exp=False)
+        if claims["exp"] - time.time() < REFRESH_MARGIN:
+            get_authed_supabase()
+            claims = token_claims(session["access_token"])
+        return claims["sub"]
+    except (RuntimeError, jwt.InvalidTokenError, AuthError):
+        # No or forged session, or the refresh was refused (RuntimeError covers SupabaseUnavailableError)
         return None
@@ -1,13 +1,15 @@
 import streamlit as st
 import os
 import re
+import time
 import hashlib
 
-# Import modules
+_run_started = time.perf_counter()
+
+# Import modules (each tool, and the Supabase SDK, is imported only once
+# it's needed, so the login page paints without loading them)
 from auth import check_authentication, get_current_user, check_permission
-from inventory_management import show_inventory_management
-from email_sender import show_email_sender
-from product_merger import show_product_merger
+import perf
 
 # Page config
 st.set_page_config(
@@ -125,6 +127,7 @@ with st.sidebar:
     if check_permission("email_sender"):
         menu_options.append("Email Sender")
     menu_options.append("Product Merger")
+    menu_options.append("Sales Analytics")
 
     if len(menu_options) <= 0:
         st.error("No module access. Contact admin.")
@@ -136,28 +139,69 @@ with st.sidebar:
     # Logout button at bottom
     st.markdown("---")
     if st.button("Logout", width='stretch'):
-        # Clear all session state
-        for key in list(st.session_state.keys()):
-            del st.session_state[key]
-        st.rerun()
+        # Staged Quick Adjust clicks live only in session state; save them first
+        unsaved = None
+        if st.session_state.get("pending_adjustments"):
+            from inventory_management import flush_staged_adjustments
+            _, unsaved = flush_staged_adjustments()
+        if unsaved:
+            st.error(f"Staged stock adjustments could not be saved, so you are still logged in. {unsaved} "
+                     "Try again, or discard them on the Inventory page.")
+        else:
+            # Clear all session state
+            from supabase_client import release_authed_supabase
+            release_authed_supabase()
+            for key in list(st.session_state.keys()):
+                del st.session_state[key]
+            st.rerun()
     
     # Version at bottom
     st.markdown("---")
     st.markdown('<div class="version-container">v2.5.0</div>', unsafe_allow_html=True)
 
+    perf.show_perf_panel()
+
 # Main content area
+# Filled in after the tool runs, since that is when Supabase failures show up
+degraded_banner = st.empty()
+
+# Leaving Inventory stops its idle-flush timer, so write any staged clicks now
+if tool != "Inventory" and st.session_state.get("pending_adjustments"):
+    from inventory_management import flush_staged_adjustments
+    saved, unsaved = flush_staged_adjustments()
+    if saved:
+        st.toast(f"Saved {saved} staged stock adjustment(s) from Inventory.")
+    if unsaved:
+        st.warning(f"Staged stock adjustments from Inventory are not saved yet. {unsaved}")
+
 if tool == "Inventory":
     if check_permission("inventory_management"):
+        from inventory_management import show_inventory_management
         show_inventory_management()
     else:
         st.error("Access Denied")
 
 elif tool == "Email Sender":
     if check_permission("email_sender"):
+        from email_sender import show_email_sender
         show_email_sender()
     else:
         st.error("Access Denied")
 
 elif tool == "Product Merger":
+    from product_merger import show_product_merger
     show_product_merger()
 
+elif tool == "Sales Analytics":
+    from sales_analytics import show_sales_analytics
+    show_sales_analytics()
+
+from supabase_client import degraded_since
+supabase_down_since = degraded_since()
+if supabase_down_since:
+    degraded_banner.warning(
+        f"⚠️ Supabase is not responding (since {time.strftime('%H:%M', time.localtime(supabase_down_since))}). "
+        "Showing the last data loaded; changes can't be saved until it recovers."
+    )
+
+perf.record("full run", (time.perf_counter() - _run_started) * 1000)